@@ -20,7 +20,7 @@ if mo:
 else:
     raise RuntimeError("Unable to find version string in %s." % (VERSIONFILE,))
 
-REQUIREMENTS = ['numpy',
+REQUIREMENTS = ['numpy>=1.15.0',
                 'matplotlib'
                 ]
 
@@ -36,7 +36,6 @@ CLASSIFIERS = ['Development Status :: 4 - Beta',
                'License :: OSI Approved :: Apache Software License',
                'Operating System :: OS Independent',
                'Programming Language :: Python',
-               'Programming Language :: Python :: 2.7',
                'Programming Language :: Python :: 3.4',
                'Programming Language :: Python :: 3.5',
                'Programming Language :: Python :: 3.6',
@@ -115,65 +115,73 @@ columns = {
 }
 
 
-def _get_field(text, coldict, key):
-    data = coldict[key]
-    strt = data['start']
-    stop = strt + data['len']
-    transform = data['read']
-    fragment = text[strt:stop]
-    if fragment:
-        return transform(fragment)
-    else:
-        return
+def _compile(columns):
+    """
+    Turns a column spec into a table of (field, slice, read function), so
+    that rows can be cut up without building or looking anything up.
+    """
+    return tuple((k, slice(s, s+l), r) for k, (s, l, r, w) in columns.items())
+
+
+# The column specs, compiled once.
+_card = _compile({'card': columns_['card']})[0]
+_tables = {card: _compile(cols) for card, cols in columns.items()}
 
 
-def _process_row(text, columns):
+def _process_row(text, table):
     """
-    Processes a single row from the file.
+    Processes a single row from the file, given a compiled table of columns.
     """
     if not text:
         return
 
-    # Construct the column dictionary that maps each field to
-    # its start, its length, and its read and write functions.
-    coldict = {k: {'start': s,
-                   'len': l,
-                   'read': r,
-                   'write': w} for k, (s, l, r, w) in columns.items()}
-
-    # Now collect the item
     item = {}
-    for field in coldict:
-        value = _get_field(text, coldict, field)
-        if value is not None:
-            item[field] = value
+    for field, cut, read in table:
+        fragment = text[cut]
+        if fragment:
+            value = read(fragment)
+            if value is not None:
+                item[field] = value
 
     return item
 
 
-def parse_canstrat(text):
+def iter_canstrat(lines):
     """
-    Read all the rows and return a dict of the results.
-    """
-    result = {}
-    for row in text.split('\n'):
-        if not row:
-            continue
+    Read the rows one at a time, yielding the card type and the fields of
+    each record.
+
+    Args:
+        lines (iterable): The lines of the file, e.g. an open file.
 
+    Yields:
+        tuple: The card type (int) and a dict of the record's fields.
+    """
+    _, cut, read = _card
+    for row in lines:
+        row = row.rstrip('\n')
         if len(row) < 8:  # Not a real record.
             continue
 
-        # Read the metadata for this row/
-        row_header = _process_row(row, columns_) or {'card': None}
-        card = row_header['card']
+        # The card type tells us how to process the rest of the row.
+        card = read(row[cut])
+        yield card, _process_row(row, _tables[card])
+
+
+def parse_canstrat(text):
+    """
+    Read all the rows and return a dict of the results.
 
-        # Now we know the card type for this row, we can process it.
-        if card is not None:
-            item = _process_row(row, columns[card])
+    Args:
+        text (str or iterable): The text of the file, or its lines, e.g. an
+            open file.
+    """
+    if isinstance(text, str):
+        text = text.split('\n')
 
-        this_list = result.get(card, [])
-        this_list.append(item)
-        result[card] = this_list
+    result = {}
+    for card, item in iter_canstrat(text):
+        result.setdefault(card, []).append(item)
 
     # Flatten if possible.
     for c, d in result.items():
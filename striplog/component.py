@@ -29,6 +29,14 @@ class Component(object):
         - quantity, e.g. '35%', or 'stringers'
         - description, e.g. from cuttings
     """
+    # The properties live in __dict__; the cached comparison key lives in a
+    # slot so it doesn't show up among them.
+    __slots__ = ('__dict__', '__key')
+
+    # Bumped whenever a component whose key has been used changes, so that
+    # objects indexing components by key (e.g. Legend) can tell when their
+    # index has gone stale.
+    _generation = 0
 
     def __init__(self, properties=None):
         if properties is not None:
@@ -44,6 +52,26 @@ class Component(object):
                     except TypeError:  # It's probably None.
                         continue
 
+    def __setattr__(self, name, value):
+        super(Component, self).__setattr__(name, value)
+        if name != '_Component__key':
+            self.__forget_key()
+        return
+
+    def __delattr__(self, name):
+        super(Component, self).__delattr__(name)
+        self.__forget_key()
+        return
+
+    def __forget_key(self):
+        """
+        Drop the cached key after a change.
+        """
+        if getattr(self, '_Component__key', None) is not None:
+            Component._generation += 1
+        self.__key = None
+        return
+
     def __str__(self):
         return self.__dict__.__str__()
 
@@ -62,10 +90,12 @@ class Component(object):
 
     def __setitem__(self, key, value):
         self.__dict__[key] = value
+        self.__forget_key()
         return
 
     def __delitem__(self, key):
         del self.__dict__[key]
+        self.__forget_key()
         return
 
     def __bool__(self):
@@ -74,41 +104,21 @@ class Component(object):
         else:
             return True
 
-    # For Python 2
-    __nonzero__ = __bool__
-
     def __eq__(self, other):
         """
         Equals
 
         Definitely a debate to be had about what constitutes equality. Here,
         we are ignoring numerical fields in the components, but not Boolean
-        ones.
+        ones. Strings are compared regardless of case.
         """
+        if self is other:
+            return True
+
         if not isinstance(other, self.__class__):
             return False
 
-        ds = self.__dict__.items()
-        do = other.__dict__.items()
-
-        try:
-            strobj = basestring  # Fails in Python 3
-        except:
-            strobj = str
-
-        # Weed out empty elements and case-desensitize.
-        try:
-            s = {k.lower(): v.lower() for k, v in ds if v}
-            o = {k.lower(): v.lower() for k, v in do if v}
-        except (AttributeError, ValueError):  # Dealing with numbers.
-            s = {k.lower(): v for k, v in ds if isinstance(v, strobj) or isinstance(v, bool)}
-            o = {k.lower(): v for k, v in do if isinstance(v, strobj) or isinstance(v, bool)}
-
-        # Compare.
-        if s == o:
-            return True
-        else:
-            return False
+        return self._key() == other._key()
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -116,10 +126,45 @@ class Component(object):
     def __hash__(self):
         """
         If we define __eq__ we also need __hash__ otherwise the object
-        becomes unhashable. All this does is hash the frozenset of the
-        keys. (You can only hash immutables.)
+        becomes unhashable. This hashes the same normalized properties that
+        __eq__ compares, so equal components always have equal hashes.
+        """
+        return hash(self._key())
+
+    def _key(self, match_only=None):
         """
-        return hash(frozenset(self.__dict__.keys()))
+        Private method. A hashable, normalized form of the component, for
+        fast look-ups in dicts and sets. String properties are lowercased,
+        Boolean properties are kept, and empty and numeric properties are
+        ignored, as in ``__eq__()``.
+
+        Args:
+            match_only (list of str): The properties to include in the key.
+                Default: All of them.
+
+        Returns:
+            frozenset. The (property, value) pairs.
+        """
+        if match_only is None:
+            try:
+                if self.__key is not None:
+                    return self.__key
+            except AttributeError:
+                pass  # Copied or unpickled without the slot set.
+
+        key = []
+        for k, v in self.__dict__.items():
+            if (match_only is not None) and (k not in match_only):
+                continue
+            if isinstance(v, bool):
+                key.append((k.lower(), v))
+            elif v and isinstance(v, str):
+                key.append((k.lower(), v.lower()))
+        key = frozenset(key)
+
+        if match_only is None:
+            self.__key = key
+        return key
 
     def keys(self):
         """
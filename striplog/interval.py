@@ -7,12 +7,9 @@ Defines intervals for holding components.
 """
 import operator
 import warnings
-from functools import total_ordering
-
-try:
-    from functools import partialmethod
-except:  # Python 2
-    from utils import partialmethod
+import weakref
+from copy import copy
+from functools import total_ordering, lru_cache, partialmethod
 
 from .component import Component
 from .position import Position
@@ -26,6 +23,38 @@ class IntervalError(Exception):
     pass
 
 
+# The lexicons that _parse() is working for, by version. The cache is keyed
+# on the version, so that it doesn't keep the lexicons alive.
+_lexicons = weakref.WeakValueDictionary()
+
+
+@lru_cache(maxsize=2**14)
+def _parse(version, text, max_component, abbreviations):
+    """
+    Private function. Turns a description into a tuple of components, and
+    remembers the answer. The key is the version of the lexicon, which
+    identifies one state of one lexicon, so a changed lexicon does not get
+    stale components. Do not change the components this returns; copy them.
+    """
+    return _parse_text(_lexicons[version], text, max_component, abbreviations)
+
+
+def _parse_text(lexicon, text, max_component, abbreviations):
+    """
+    Private function. Turns a description into a tuple of components.
+    """
+    if abbreviations:
+        text = lexicon.expand_abbreviations(text)
+
+    components = []
+    for p, part in enumerate(lexicon.split_description(text)):
+        if p == max_component:
+            break
+        components.append(Component.from_text(part, lexicon))
+
+    return tuple(components)
+
+
 @total_ordering
 class Interval(object):
     """
@@ -99,11 +128,33 @@ class Interval(object):
                     warnings.warn(w)
                 self.components = []
 
+    @staticmethod
+    def parse_cache_info():
+        """
+        Statistics for the cache of parsed descriptions, which is shared by
+        all Intervals. Repeated descriptions are only parsed once per
+        lexicon.
+
+        Returns:
+            namedtuple. The hits, misses, maxsize and currsize of the cache.
+        """
+        return _parse.cache_info()
+
+    @staticmethod
+    def clear_parse_cache():
+        """
+        Empty the cache of parsed descriptions, and reset its statistics.
+        """
+        _parse.cache_clear()
+        return
+
     def __setattr__(self, name, value):
         # If we were passed top or base, make sure it's a position.
-        if name in ['top', 'base']:
+        if name in ('top', 'base'):
             if not isinstance(value, Position):
                 value = Position(middle=value)
+            if name in self.__dict__:  # Replacing a Position.
+                Position._generation += 1
         # Must now use the parent's setattr, or we go in circles.
         super(Interval, self).__setattr__(name, value)
         return
@@ -628,15 +679,14 @@ class Interval(object):
         Returns:
             List. A list of Components extracted from the description text.
         """
-        if abbreviations:
-            text = lexicon.expand_abbreviations(self.description)
+        version = getattr(lexicon, '_version', None)
+        if version is None:  # Not a Lexicon, so parse without the cache.
+            components = _parse_text(lexicon, self.description,
+                                     max_component, abbreviations)
         else:
-            text = self.description
-
-        components = []
-        for p, part in enumerate(lexicon.split_description(text)):
-            if p == max_component:
-                break
-            components.append(Component.from_text(part, lexicon))
+            _lexicons[version] = lexicon
+            components = _parse(version, self.description,
+                                max_component, abbreviations)
 
-        return components
+        # Hand out copies, so the cached components can't be changed.
+        return [copy(c) for c in components]
@@ -12,15 +12,10 @@ import warnings
 import random
 import re
 import itertools
-
-try:
-    from functools import partialmethod
-except:  # Python 2
-    from utils import partialmethod
+from copy import copy
+from functools import partialmethod
 
 import numpy as np
-from matplotlib import patches
-import matplotlib.pyplot as plt
 
 from .component import Component
 from . import utils
@@ -34,12 +29,6 @@ from .defaults import TIMESCALE__ISC
 from .defaults import TIMESCALE__USGS_ISC
 from .defaults import TIMESCALE__DNAG
 
-###############################################
-# This module is not used directly, but must
-# be imported in order to register new hatches.
-from . import hatches  # DO NOT DELETE
-###############################################
-
 
 class LegendError(Exception):
     """
@@ -72,6 +61,10 @@ class Decor(object):
       d = {'component': my_rock, 'colour': 'red'}
       my_decor = Decor(d)
     """
+    # Bumped whenever a Decor's component, curve or colour is replaced, so that
+    # Legends can tell when their look-up index has gone stale.
+    _generation = 0
+
     def __init__(self, *params, **kwargs):
         """
         Supports the passing in of a single dictionary, or the passing of
@@ -110,6 +103,13 @@ class Decor(object):
         if self.hatch == 'none':
             self.hatch = None
 
+    def __setattr__(self, name, value):
+        if name in ('component', 'curve', 'colour'):
+            if getattr(self, name, None) is not None:
+                Decor._generation += 1
+        super(Decor, self).__setattr__(name, value)
+        return
+
     def __repr__(self):
         s = repr(self.__dict__)
         return "Decor({0})".format(s)
@@ -284,6 +284,11 @@ class Decor(object):
                 in a fig, you get it. If you pass nothing, the function creates a
                 plot object as a side-effect.
         """
+        # Matplotlib is only imported when it's needed, since it's slow.
+        import matplotlib.pyplot as plt
+        from matplotlib import patches
+        from . import hatches  # Registers the custom hatches.
+
 
         u = 4     # aspect ratio of decor plot
         v = 0.25  # ratio of decor tile width
@@ -334,10 +339,15 @@ class Legend(object):
             as `from_xls` and so on.
     """
 
+    # Builtin legends, parsed once and copied after that. See builtin().
+    _builtins = {}
+
     def __init__(self, list_of_Decors):
         self.table = [d.__dict__ for d in list_of_Decors]
         self.__list = list_of_Decors
         self.__index = 0
+        self.__lookup = None
+        self.__colours = None
         self._iter = iter(self.__list)  # Set up iterable.
 
     def __repr__(self):
@@ -363,6 +373,8 @@ class Legend(object):
 
     def __setitem__(self, key, value):
         self.__list[key] = value
+        self.__lookup = None
+        self.__colours = None
 
     def __iter__(self):
         return self
@@ -376,12 +388,6 @@ class Legend(object):
         self.__index += 1
         return result
 
-    def next(self):
-        """
-        Retains Python 2 compatibility.
-        """
-        return self.__next__()
-
     def __len__(self):
         return len(self.__list)
 
@@ -446,7 +452,7 @@ class Legend(object):
                  'nagmdm__4_3': LEGEND__NAGMDM__4_3,
                  'sgmc': LEGEND__SGMC,
                  }
-        return cls.from_csv(text=names[name.lower()])
+        return cls.__from_builtin(names[name.lower()])
 
     @classmethod
     def builtin_timescale(cls, name):
@@ -461,7 +467,22 @@ class Legend(object):
                  'usgs_isc': TIMESCALE__USGS_ISC,
                  'dnag': TIMESCALE__DNAG,
                  }
-        return cls.from_csv(text=names[name.lower()])
+        return cls.__from_builtin(names[name.lower()])
+
+    @classmethod
+    def __from_builtin(cls, text):
+        """
+        Private method. Parses one of the CSV strings in `defaults.py` the
+        first time it's asked for, and hands out copies after that, so you
+        can change them without affecting anyone else.
+
+        Returns:
+            Legend.
+        """
+        legend = cls._builtins.get((cls, text))
+        if legend is None:
+            legend = cls._builtins[(cls, text)] = cls.from_csv(text=text)
+        return legend.copy()
 
     # Curry.
     default = partialmethod(builtin, name="NAGMDM__6_2")
@@ -513,7 +534,10 @@ class Legend(object):
     def from_image(cls, filename, components,
                    ignore=None,
                    col_offset=0.1,
-                   row_offset=2):
+                   row_offset=2,
+                   col_width=1,
+                   col_function='mode',
+                   row_step=1):
         """
         A slightly easier way to make legends from images.
 
@@ -525,22 +549,30 @@ class Legend(object):
                 across the image. If > 1, interpreted as pixels from left.
             row_offset (int): Number of pixels to skip at the top of each
                 interval.
+            col_width (Number): The width of the band of pixel columns to
+                use, centred on ``col_offset``. If < 1, the proportion of the
+                image width.
+            col_function (str): How to reduce the band to one colour per
+                row, 'mode' or 'median'.
+            row_step (int): Only use every ``row_step``-th row of pixels.
         """
         if ignore is None:
             ignore = []
 
-        rgb = utils.loglike_from_image(filename, offset=col_offset)
-        loglike = np.array([utils.rgb_to_hex(t) for t in rgb])
+        rgb = utils.loglike_from_image(filename, offset=col_offset,
+                                       width=col_width,
+                                       function=col_function,
+                                       step=row_step)
+        loglike = utils.rgb_to_code(rgb)
 
-        # Get the pixels and colour values at 'tops' (i.e. changes).
-        _, hexes = utils.tops_from_loglike(loglike, offset=row_offset)
+        # Get the pixels and colour codes at 'tops' (i.e. changes).
+        _, codes = utils.tops_from_loglike(loglike, offset=row_offset)
 
-        # Reduce to unique colours.
-        hexes_reduced = []
-        for h in hexes:
-            if h not in hexes_reduced:
-                if h not in ignore:
-                    hexes_reduced.append(h)
+        # Reduce to unique colours, in order of appearance.
+        _, first = np.unique(codes, return_index=True)
+        ignore = [h.lower() for h in ignore]
+        hexes_reduced = [h for h in utils.code_to_hex(codes[np.sort(first)])
+                         if h not in ignore]
 
         list_of_Decors = []
         for i, c in enumerate(components):
@@ -578,15 +610,21 @@ class Legend(object):
 
         if (filename is not None):
             with open(filename, 'r') as f:
-                text = f.read()
+                return cls.__from_csv_lines(f)
 
-        try:
-            f = StringIO(text)  # Python 3
-        except TypeError:
-            f = StringIO(unicode(text))  # Python 2
+        return cls.__from_csv_lines(StringIO(text))
 
+    @classmethod
+    def __from_csv_lines(cls, f):
+        """
+        Private method. Reads CSV from an open file, or any other iterable of
+        lines, one row at a time. See ``from_csv()``.
+
+        Returns:
+            Legend.
+        """
         r = csv.DictReader(f, skipinitialspace=True)
-        list_of_Decors, components = [], []
+        list_of_Decors, lines, duplicates = [], {}, []
         kind = 'component'
         for row in r:
             d, component = {}, {}
@@ -621,19 +659,41 @@ class Legend(object):
             this_component = Component(component)
             d[kind] = this_component
 
-            # Check for duplicates and warn.
-            if this_component in components:
-                with warnings.catch_warnings():
-                    warnings.simplefilter("always")
-                    w = "This legend contains duplicate components."
-                    warnings.warn(w)
-            components.append(this_component)
+            # Check for duplicates, noting the line they end on.
+            first = lines.setdefault(this_component, r.line_num)
+            if first != r.line_num:
+                duplicates.append('{} (same as {})'.format(r.line_num, first))
 
             # Append to the master list and continue.
             list_of_Decors.append(Decor(d))
 
+        if duplicates:
+            with warnings.catch_warnings():
+                warnings.simplefilter("always")
+                w = "This legend contains duplicate components, on lines "
+                w += ", ".join(duplicates) + "."
+                warnings.warn(w)
+
         return cls(list_of_Decors)
 
+    def copy(self):
+        """
+        Returns a copy of the legend, with copies of its Decors and their
+        Components. This is much faster than ``deepcopy()``.
+
+        Returns:
+            Legend.
+        """
+        list_of_Decors = []
+        for d in self.__list:
+            decor = Decor.__new__(Decor)
+            decor.__dict__.update(d.__dict__)
+            for k in ('component', 'curve'):
+                if k in decor.__dict__:
+                    decor.__dict__[k] = copy(decor.__dict__[k])
+            list_of_Decors.append(decor)
+        return self.__class__(list_of_Decors)
+
     def to_csv(self):
         """
         Renders a legend as a CSV string.
@@ -693,6 +753,25 @@ class Legend(object):
         except:
             return 0
 
+    def __decor_index(self):
+        """
+        Map the normalized key of each Decor's component to the first Decor
+        having it, building the map on first use and again whenever the
+        Legend, its Decors or their Components have changed.
+
+        Returns:
+            dict. The Decors, keyed on Component._key().
+        """
+        state = (len(self.__list), Component._generation, Decor._generation)
+        if (self.__lookup is None) or (self.__lookup[0] != state):
+            index = {}
+            for decor in self.__list:
+                component = getattr(decor, 'component', None)
+                if isinstance(component, Component):
+                    index.setdefault(component._key(), decor)
+            self.__lookup = (state, index)
+        return self.__lookup[1]
+
     def get_decor(self, c, match_only=None):
         """
         Get the decor for a component.
@@ -707,15 +786,11 @@ class Legend(object):
         """
         if isinstance(c, Component):
             if c:
-                if match_only:
-                    # Filter the component only those attributes
-                    c = Component({k: getattr(c, k, None) for k in match_only})
-                for decor in self.__list:
-                    try:
-                        if c == decor.component:
-                            return decor
-                    except AttributeError:
-                        continue
+                # Filter the component to only those attributes.
+                key = c._key(match_only=match_only or None)
+                decor = self.__decor_index().get(key)
+                if decor is not None:
+                    return decor
         else:
             for decor in self.__list:
                 try:
@@ -789,55 +864,127 @@ class Legend(object):
                             default=default,
                             match_only=match_only)
 
-    def get_component(self, colour, tolerance=0, default=None):
+    def __colour_table(self, space):
         """
-        Get the component corresponding to a display colour. This is for
-        generating a Striplog object from a colour image of a striplog.
+        The colours of the Decors with components, built on first use and
+        again whenever the Legend or its Decors have changed.
 
         Args:
-           colour (str): The hex colour string to look up.
+            space (str): The colourspace, 'rgb' or 'lab'.
+
+        Returns:
+            tuple. The Decors, a dict mapping each hex colour to the index
+                of the first Decor with it, and an array of their
+                coordinates in the colourspace, one row per Decor.
+        """
+        state = (len(self.__list), Decor._generation)
+        if (self.__colours is None) or (self.__colours[0] != state):
+            self.__colours = (state, {})
+        tables = self.__colours[1]
+
+        if space not in tables:
+            decors = [d for d in self.__list
+                      if getattr(d, 'component', None) is not None]
+            exact = {}
+            for i, decor in enumerate(decors):
+                exact.setdefault(decor.colour.lower(), i)
+            coords = np.array([decor.rgb for decor in decors],
+                              dtype=float).reshape(-1, 3)
+            if space == 'lab':
+                coords = utils.rgb_to_lab(coords)
+            tables[space] = (decors, exact, coords)
+
+        return tables[space]
+
+    def get_components(self, colours, tolerance=0, default=None, space='rgb'):
+        """
+        Get the components corresponding to some display colours, and how
+        far each colour is from its match. All the colours are compared to
+        all the Decors in one go, which is much faster than calling
+        `get_component()` for each colour.
+
+        Args:
+           colours (list of str): The hex colour strings to look up.
            tolerance (float): The colourspace distance within which to match.
-           default (component or None): The component to return in the event
-           of no match.
+           default (component or None): The component to return for a colour
+               with no match.
+           space (str): The colourspace in which to measure distance: 'rgb'
+               (the default), or 'lab' for CIELAB, in which distance is
+               closer to the perceived difference between colours.
 
         Returns:
-           component. The component best matching the provided colour.
+           tuple. The list of components best matching the colours, and an
+               array of the distance from each colour to its best match.
         """
-        if not (0 <= tolerance <= np.sqrt(195075)):
+        if space not in ('rgb', 'lab'):
+            raise LegendError("space must be 'rgb' or 'lab'")
+        if (space == 'rgb') and not (0 <= tolerance <= np.sqrt(195075)):
             raise LegendError('Tolerance must be between 0 and 441.67')
 
-        for decor in self.__list:
-            if colour.lower() == decor.colour:
-                return decor.component
-
-        # If we're here, we didn't find one yet.
-        r1, g1, b1 = utils.hex_to_rgb(colour)
-
-        # Start with a best match of black.
-        best_match = '#000000'
-        best_match_dist = np.sqrt(r1**2. + g1**2. + b1**2.)
-
-        # Now compare to each colour in the legend.
-        for decor in self.__list:
-            r2, g2, b2 = decor.rgb
-            distance = np.sqrt((r2-r1)**2. + (g2-g1)**2. + (b2-b1)**2.)
-            if distance < best_match_dist:
-                best_match = decor.component
-                best_match_dist = distance
-                best_match_colour = decor.colour
-
-        if best_match_dist <= tolerance:
-            return best_match
-        else:
+        decors, exact, coords = self.__colour_table(space)
+        colours = [c.lower() for c in colours]
+        points = np.array([utils.hex_to_rgb(c) for c in colours],
+                          dtype=float).reshape(-1, 3)
+        if space == 'lab':
+            points = utils.rgb_to_lab(points)
+
+        best = np.zeros(len(colours), dtype=int)
+        dists = np.full(len(colours), np.inf)
+        if decors:
+            # Compare in chunks to keep the distance matrix small.
+            chunk = max(1, 2**20 // len(decors))
+            for i in range(0, len(colours), chunk):
+                diff = points[i:i+chunk, None, :] - coords[None, :, :]
+                d = np.sqrt(np.sum(diff**2, axis=-1))
+                best[i:i+chunk] = np.argmin(d, axis=1)
+                dists[i:i+chunk] = np.min(d, axis=1)
+
+        # An exact match on the hex string always wins.
+        for i, colour in enumerate(colours):
+            j = exact.get(colour)
+            if j is not None:
+                best[i], dists[i] = j, 0
+
+        components = []
+        for colour, j, dist in zip(colours, best, dists):
+            if dist <= tolerance:
+                components.append(decors[j].component)
+                continue
             with warnings.catch_warnings():
                 warnings.simplefilter("always")
-                w = "No match found for {0} ".format(colour.lower())
-                w += "with tolerance of {0}. Best match is ".format(tolerance)
-                w += "{0}, {1}".format(best_match.summary(), best_match_colour)
-                w += ", d={0}".format(best_match_dist)
+                w = "No match found for {0} ".format(colour)
+                w += "with tolerance of {0}.".format(tolerance)
+                if decors:
+                    w += " Best match is "
+                    w += "{0}, {1}".format(decors[j].component.summary(),
+                                           decors[j].colour)
+                    w += ", d={0}".format(dist)
                 warnings.warn(w)
+            components.append(default)
 
-            return default
+        return components, dists
+
+    def get_component(self, colour, tolerance=0, default=None, space='rgb'):
+        """
+        Get the component corresponding to a display colour. This is for
+        generating a Striplog object from a colour image of a striplog.
+
+        Args:
+           colour (str): The hex colour string to look up.
+           tolerance (float): The colourspace distance within which to match.
+           default (component or None): The component to return in the event
+           of no match.
+           space (str): The colourspace, 'rgb' or 'lab'. See
+               `get_components()`.
+
+        Returns:
+           component. The component best matching the provided colour.
+        """
+        components, _ = self.get_components([colour],
+                                            tolerance=tolerance,
+                                            default=default,
+                                            space=space)
+        return components[0]
 
     def plot(self, fmt=None):
         """
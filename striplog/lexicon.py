@@ -10,12 +10,16 @@ from io import open
 import json
 import warnings
 import re
-from itertools import islice
+from itertools import count
 
 from . import defaults
 
 SPECIAL = ['synonyms', 'splitters', 'parts_of_speech', 'abbreviations']
 
+# Every change to any lexicon gets a new version number from here, so a
+# version identifies one state of one lexicon.
+_versions = count()
+
 
 class LexiconError(Exception):
     """
@@ -46,18 +50,72 @@ class Lexicon(object):
             if not getattr(self, attr, None):
                 setattr(self, attr, None)
 
+    def __setattr__(self, name, value):
+        super(Lexicon, self).__setattr__(name, value)
+        if not name.startswith('_'):
+            self.clear_cache()
+        return
+
+    def __delattr__(self, name):
+        super(Lexicon, self).__delattr__(name)
+        if not name.startswith('_'):
+            self.clear_cache()
+        return
+
     def __repr__(self):
-        return str(self.__dict__)
+        return str(dict(self._items()))
 
     def __str__(self):
-        keys = self.__dict__.keys()
-        counts = [len(v) for k, v in self.__dict__.items() if v]
+        keys = [k for k, v in self._items()]
+        counts = [len(v) for k, v in self._items() if v]
         s = "Lexicon("
         for i in zip(keys, counts):
             s += "'{0}': {1} items, ".format(*i)
         s += ")"
         return s
 
+    def _items(self):
+        """
+        Private method. The lexicon's entries, without its private
+        attributes (e.g. the cache).
+
+        Returns:
+            list. A list of (name, entry) tuples.
+        """
+        return [(k, v) for k, v in self.__dict__.items()
+                if not k.startswith('_')]
+
+    def clear_cache(self):
+        """
+        Forget the compiled regexes and look-up tables; they are rebuilt
+        the next time they are needed. This happens automatically when you
+        set or delete an entry, but if you change one of the lexicon's lists
+        or dicts in place, you need to call this yourself.
+        """
+        self._cache = {}
+        self._version = next(_versions)
+        return
+
+    def _pattern(self, category):
+        """
+        Private method. The compiled regex matching any word in a category,
+        built on first use.
+
+        Args:
+            category (str): The category.
+
+        Returns:
+            regex.
+        """
+        key = ('category', category)
+        pattern = self._cache.get(key)
+        if pattern is None:
+            words = getattr(self, category)
+            regex = r'(\b' + r'\b|\b'.join(words) + r'\b)'
+            pattern = re.compile(regex, flags=re.IGNORECASE)
+            self._cache[key] = pattern
+        return pattern
+
     @classmethod
     def default(cls):
         """
@@ -96,10 +154,7 @@ class Lexicon(object):
             s = 'GREYISH-GREEN limestone with RED or GREY sandstone.'
             find_word_groups(s, COLOURS) --> ['greyish green', 'red', 'grey']
         """
-        f = re.IGNORECASE
-        words = getattr(self, category)
-        regex = re.compile(r'(\b' + r'\b|\b'.join(words) + r'\b)', flags=f)
-        candidates = regex.finditer(text)
+        candidates = self._pattern(category).finditer(text)
 
         starts, ends = [], []
         groups = []
@@ -155,11 +210,14 @@ class Lexicon(object):
             Make it handle case, returning the same case it received.
         """
         if word and self.synonyms:
-            # Make the reverse look-up table.
-            reverse_lookup = {}
-            for k, v in self.synonyms.items():
-                for i in v:
-                    reverse_lookup[i.lower()] = k.lower()
+            # Make the reverse look-up table, once.
+            reverse_lookup = self._cache.get('synonyms')
+            if reverse_lookup is None:
+                reverse_lookup = {}
+                for k, v in self.synonyms.items():
+                    for i in v:
+                        reverse_lookup[i.lower()] = k.lower()
+                self._cache['synonyms'] = reverse_lookup
 
             # Now check words against this table.
             if word.lower() in reverse_lookup:
@@ -182,15 +240,6 @@ class Lexicon(object):
         if not self.abbreviations:
             raise LexiconError("No abbreviations in lexicon.")
 
-        def chunks(data, SIZE=25):
-            """
-            Regex only supports 100 groups for munging callbacks. So we have to
-            chunk the abbreviation dicitonary.
-            """
-            it = iter(data)
-            for i in range(0, len(data), SIZE):
-                yield {k: data[k] for k in islice(it, SIZE)}
-
         def cb(g):
             """Regex callback"""
             return self.abbreviations.get(g.group(0)) or g.group(0)
@@ -199,14 +248,30 @@ class Lexicon(object):
 
         # TODO: We should handle these with a special set of
         # replacements that are made before the others.
-        text = re.sub(r'w/', r'wi', text)
+        text = text.replace('w/', 'wi')
+
+        # Replace everything in one pass.
+        return self._abbreviation_pattern().sub(cb, text)
 
-        # Main loop.
-        for subdict in chunks(self.abbreviations):
-            regex = r'(\b' + r'\b)|(\b'.join(subdict.keys()) + r'\b)'
-            text = re.sub(regex, cb, text)
+    def _abbreviation_pattern(self):
+        """
+        Private method. The compiled regex matching any of the abbreviations
+        as a whole word, built on first use. The abbreviations are matched
+        literally, and where several match at the same place, the longest
+        wins.
 
-        return text
+        Returns:
+            regex.
+        """
+        pattern = self._cache.get('abbreviations')
+        if pattern is None:
+            keys = sorted(filter(None, self.abbreviations), key=len, reverse=True)
+            # Not \b, which can't match after a key ending in punctuation.
+            alternatives = r'|'.join(map(re.escape, keys))
+            regex = r'(?<!\w)(?:' + alternatives + r')(?!\w)'
+            pattern = re.compile(regex)
+            self._cache['abbreviations'] = pattern
+        return pattern
 
     def get_component(self, text, required=False, first_only=True):
         """
@@ -220,7 +285,7 @@ class Lexicon(object):
         """
         component = {}
 
-        for i, (category, words) in enumerate(self.__dict__.items()):
+        for i, (category, words) in enumerate(self._items()):
 
             # There is probably a more elegant way to do this.
             if category in SPECIAL:
@@ -268,8 +333,11 @@ class Lexicon(object):
         t = re.sub(r'\,?\;?\.? ?((under)?(less than)? \d+%) (?=\w)', r' '+splitter+' \1 ', t)
 
         # Split.
-        f = re.IGNORECASE
-        pattern = re.compile(r'(?:' + r'|'.join(words) + r')', flags=f)
+        pattern = self._cache.get('splitters')
+        if pattern is None:
+            f = re.IGNORECASE
+            pattern = re.compile(r'(?:' + r'|'.join(words) + r')', flags=f)
+            self._cache['splitters'] = pattern
         parts = filter(None, pattern.split(t))
 
         return [i.strip() for i in parts]
@@ -283,5 +351,5 @@ class Lexicon(object):
         Returns:
             list: A list of strings of category names.
         """
-        keys = [k for k in self.__dict__.keys() if k not in SPECIAL]
+        keys = [k for k, v in self._items() if k not in SPECIAL]
         return keys
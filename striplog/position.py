@@ -34,6 +34,11 @@ class Position(object):
     Sticking to upper and lower, because ordering in Intervals is already
     based on 'above' and 'below'.
     """
+    # Bumped whenever an existing Position is changed, so that objects
+    # caching depths (e.g. Striplog's boundary arrays) can tell when their
+    # cache has gone stale.
+    _generation = 0
+
     def __init__(self,
                  middle=None,
                  upper=None, lower=None,
@@ -41,33 +46,44 @@ class Position(object):
                  units='m',
                  meta=None):
 
+        # Fill in the attributes directly, since setting them one by one
+        # would count as changing a Position. See __setattr__().
+        d = self.__dict__
+
         if middle is None:
             if not (upper and lower):
                 m = "You must provide middle, or upper and lower."
                 raise PositionError(m)
         else:
-            self.middle = float(middle)
+            d['middle'] = float(middle)
 
         if upper is not None:
-            self.upper = float(upper)
+            d['upper'] = float(upper)
         else:
-            self.upper = self.middle
+            d['upper'] = self.middle
 
         if lower is not None:
-            self.lower = float(lower)
+            d['lower'] = float(lower)
         else:
-            self.lower = self.middle
+            d['lower'] = self.middle
 
         if x is not None:
             if y is None:
                 raise PositionError("You must provide x and y.")
             else:
-                self.x, self.y = x, y
+                d['x'], d['y'] = x, y
 
-        self.units = units
+        d['units'] = units
 
         if meta is not None:
-            self.meta = Meta(meta)
+            d['meta'] = Meta(meta)
+
+    def __setattr__(self, name, value):
+        # Only changes to an existing Position count; a new one can't affect
+        # anything cached.
+        Position._generation += 1
+        super(Position, self).__setattr__(name, value)
+        return
 
     def __str__(self):
         """
@@ -5,27 +5,33 @@ A striplog is a sequence of intervals.
 :copyright: 2019 Agile Geoscience
 :license: Apache 2.0
 """
+import os
 import re
 from io import StringIO
 import csv
+import json
+import numbers
 import operator
 import warnings
 from collections import defaultdict
-from functools import reduce
-from copy import deepcopy
+from copy import copy, deepcopy
 
 import numpy as np
-import matplotlib as mpl
-import matplotlib.pyplot as plt
 
 from .interval import Interval, IntervalError
+from .position import Position
 from .component import Component
 from .legend import Legend
-from .canstrat import parse_canstrat
+from .canstrat import iter_canstrat
 from . import utils
 from . import templates
 
 
+# Rows of the array of boundaries that a Striplog keeps in step with its
+# list of Intervals. See ``Striplog._bounds``.
+_TOP, _BASE, _TOP_UPPER, _TOP_LOWER, _BASE_UPPER, _BASE_LOWER = range(6)
+
+
 class StriplogError(Exception):
     """
     Generic error class.
@@ -33,6 +39,48 @@ class StriplogError(Exception):
     pass
 
 
+class _IntervalView(object):
+    """
+    A read-only window onto part of a list of Intervals. Slicing a Striplog
+    gives a Striplog holding one of these, so that it shares its parent's
+    list instead of copying it. A Striplog swaps it for a list of its own
+    before changing it.
+
+    Args:
+        items (list): The list of Intervals to look at.
+        indices (range): The indices into ``items`` that are in the window.
+    """
+    __slots__ = ('items', 'indices')
+
+    def __init__(self, items, indices):
+        self.items = items
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, key):
+        if type(key) is slice:
+            return _IntervalView(self.items, self.indices[key])
+        return self.items[self.indices[key]]
+
+    def __iter__(self):
+        return map(self.items.__getitem__, self.indices)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __reduce__(self):
+        # Copies and pickles are ordinary lists of just these Intervals.
+        return (list, (list(self),))
+
+    def copy(self):
+        return list(self)
+
+
 class Striplog(object):
     """
     A Striplog is a sequence of intervals.
@@ -52,16 +100,20 @@ class Striplog(object):
             m = "Cannot create an empty Striplog."
             raise StriplogError(m)
 
+        # One pass over the intervals gets all the boundaries we need.
+        bounds = self.__build_bounds(list_of_Intervals)
+        tops, bases = bounds[_TOP], bounds[_BASE]
+
         if order.lower()[0] == 'a':  # Auto
             # If bases == tops, then this is a bunch of 'points'.
-            if all([iv.base.z == iv.top.z for iv in list_of_Intervals]):
+            if np.all(bases == tops):
                 order = 'none'
                 self.order = 'none'
             # We will tolerate zero-thickness intervals mixed in.
-            elif all([iv.base.z >= iv.top.z for iv in list_of_Intervals]):
+            elif np.all(bases >= tops):
                 order = 'depth'
                 self.order = 'depth'
-            elif all([iv.base.z <= iv.top.z for iv in list_of_Intervals]):
+            elif np.all(bases <= tops):
                 order = 'elevation'
                 self.order = 'elevation'
             else:
@@ -71,37 +123,45 @@ class Striplog(object):
         if order.lower()[0] == 'n':
             self.order = 'none'
             # Sanity check
-            fail = any([iv.base.z != iv.top.z for iv in list_of_Intervals])
+            fail = np.any(bases != tops)
             if fail:
                 m = "'None' order specified but tops != bases."
                 raise StriplogError(m)
             # Order force
-            list_of_Intervals.sort(key=operator.attrgetter('top'))
+            idx = np.argsort(tops, kind='stable')
 
         elif order.lower()[0] == 'd':
             self.order = 'depth'
             # Sanity check
-            fail = any([iv.base.z < iv.top.z for iv in list_of_Intervals])
+            fail = np.any(bases < tops)
             if fail:
                 m = "Depth order specified but base above top."
                 raise StriplogError(m)
             # Order force
-            list_of_Intervals.sort(key=operator.attrgetter('top'))
+            idx = np.argsort(tops, kind='stable')
 
         else:
             self.order = 'elevation'
-            fail = any([iv.base.z > iv.top.z for iv in list_of_Intervals])
+            fail = np.any(bases > tops)
             if fail:
                 m = "Elevation order specified but base above top."
                 raise StriplogError(m)
-            # Order force
-            r = True
-            list_of_Intervals.sort(key=operator.attrgetter('top'), reverse=r)
+            # Order force; a stable sort on the negated tops is the same
+            # as sorting in reverse.
+            idx = np.argsort(-tops, kind='stable')
+
+        # Sort in place, as before, and keep the boundaries in step.
+        list_of_Intervals[:] = [list_of_Intervals[i] for i in idx]
+        bounds = bounds[:, idx]
+        bounds.flags.writeable = False
 
         self.source = source
 
         self.__list = list_of_Intervals
+        self.__shared = False  # Whether a slice is looking at the list.
         self.__index = 0  # Set up iterable.
+        self.__set_bounds(bounds)
+        self.__lookup = None
 
     def __repr__(self):
         length = len(self.__list)
@@ -114,24 +174,53 @@ class Striplog(object):
 
     def __getitem__(self, key):
         if type(key) is slice:
-            i = key.indices(len(self.__list))
-            result = [self.__list[n] for n in range(*i)]
-            if result:
-                return Striplog(result)
-            else:
+            # A view on this striplog's list and boundaries; nothing is
+            # copied, checked or sorted. Reverse slices keep the order.
+            indices = range(len(self.__list))[key]
+            if not indices:
                 return None
+            bounds = self._bounds[:, key]
+            if indices.step < 0:
+                indices, bounds = indices[::-1], bounds[:, ::-1]
+            if isinstance(self.__list, _IntervalView):
+                view = self.__list[indices.start:indices.stop:indices.step]
+            else:
+                view = _IntervalView(self.__list, indices)
+                self.__shared = True
+            return self.__from_sorted(view, bounds, self.order, self.source)
         elif type(key) is list:
             result = []
             for j in key:
                 result.append(self.__list[j])
-            if result:
-                return Striplog(result)
-            else:
+            if not result:
                 return None
+            idx = np.arange(len(self.__list))[key]
+            if np.any(np.diff(idx) < 0):
+                return Striplog(result)
+            return self.__from_sorted(result,
+                                      self._bounds[:, idx],
+                                      self.order,
+                                      self.source)
         else:
             return self.__list[key]
 
+    def __own(self):
+        """
+        Private method. Makes sure the list of Intervals belongs to this
+        striplog alone, copying it if it is a view on another striplog's
+        list, or if a slice is looking at it. Call before changing the list
+        in place.
+
+        Returns:
+            None.
+        """
+        if self.__shared or not isinstance(self.__list, list):
+            self.__list = list(self.__list)
+            self.__shared = False
+        return
+
     def __delitem__(self, key):
+        self.__own()
         if (type(key) is list) or (type(key) is tuple):
             # Have to compute what the indices *will* be as
             # the initial ones are deleted.
@@ -140,9 +229,12 @@ class Striplog(object):
                 del self.__list[k]
         else:
             del self.__list[key]
+        self.__bounds = None
         return
 
     def __insert(self, index, item):
+        self.__own()
+        self.__bounds = None
         if isinstance(item, self.__class__):
             for i, iv in enumerate(item):
                 self.__list.insert(index+i, iv)
@@ -158,6 +250,8 @@ class Striplog(object):
     def __setitem__(self, key, value):
         if not key:
             return
+        self.__own()
+        self.__bounds = None
         try:
             for i, j in enumerate(key):
                 self.__list[j] = value[i]
@@ -181,12 +275,6 @@ class Striplog(object):
         self.__index += 1
         return result
 
-    def next(self):
-        """
-        For Python 2 compatibility.
-        """
-        return self.__next__()
-
     def __contains__(self, item):
         for r in self.__list:
             if item in r.components:
@@ -194,14 +282,14 @@ class Striplog(object):
         return False
 
     def __reversed__(self):
-        return Striplog(self.__list[::-1])
+        return Striplog(list(self.__list)[::-1])
 
     def __add__(self, other):
         if isinstance(other, self.__class__):
-            result = self.__list + other.__list
+            result = list(self.__list) + list(other.__list)
             return Striplog(result)
         elif isinstance(other, Interval):
-            result = self.__list + [other]
+            result = list(self.__list) + [other]
             return Striplog(result)
         else:
             raise StriplogError("You can only add striplogs or intervals.")
@@ -242,9 +330,130 @@ class Striplog(object):
         Returns:
             None.
         """
+        self.__own()
         self.__list.sort(key=operator.attrgetter('top'))
+        self.__bounds = None
         return
 
+    @staticmethod
+    def __build_bounds(list_of_Intervals):
+        """
+        Private method. Walks a list of Intervals once and gathers the 'z' of
+        the tops and bases, and their upper and lower bounds.
+
+        Returns:
+            ndarray. A read-only (6 x n) array of floats.
+        """
+        rows = [(iv.top.z, iv.base.z,
+                 iv.top.upper, iv.top.lower,
+                 iv.base.upper, iv.base.lower) for iv in list_of_Intervals]
+        bounds = np.array(rows, dtype=float).reshape(-1, 6).T.copy()
+        bounds.flags.writeable = False
+        return bounds
+
+    @classmethod
+    def __from_sorted(cls, list_of_Intervals, bounds, order, source):
+        """
+        Private method. Makes a striplog from intervals that are already in
+        order, with their boundary array, skipping the checks and the walk
+        over the intervals in ``__init__()``.
+
+        Returns:
+            Striplog.
+        """
+        bounds.flags.writeable = False
+        strip = cls.__new__(cls)
+        strip.order = order
+        strip.source = source
+        strip.__list = list_of_Intervals
+        strip.__shared = False
+        strip.__index = 0
+        strip.__set_bounds(bounds)
+        strip.__lookup = None
+        return strip
+
+    @staticmethod
+    def __copy_interval(iv):
+        """
+        Private method. Copies an interval along with its top, base, data and
+        components, so that the copy can be changed without changing the
+        original. Much faster than ``deepcopy()``.
+
+        Returns:
+            Interval.
+        """
+        new = copy(iv)
+        d = new.__dict__
+        d['top'] = copy(iv.top)
+        d['base'] = d['top'] if iv.base is iv.top else copy(iv.base)
+        d['data'] = dict(iv.data)
+        d['components'] = [copy(c) for c in iv.components]
+        return new
+
+    def __set_bounds(self, bounds):
+        """
+        Private method. Caches the boundary array, noting which Positions it
+        was computed from.
+        """
+        self.__bounds = bounds
+        self.__generation = Position._generation
+        return
+
+    @property
+    def _bounds(self):
+        """
+        Private property. The boundaries of all the intervals as a read-only
+        (6 x n) array of floats, one row each for top, base, top upper, top
+        lower, base upper, and base lower. It is rebuilt whenever the list of
+        intervals, or any Position, has changed since it was last computed.
+
+        Returns:
+            ndarray.
+        """
+        if self.__bounds is None:
+            self.__set_bounds(self.__build_bounds(self.__list))
+        elif self.__generation != Position._generation:
+            # Keep the same array if nothing actually moved, so that caches
+            # depending on it stay valid.
+            bounds = self.__build_bounds(self.__list)
+            old = self.__bounds
+            if bounds.shape == old.shape:
+                same = (bounds == old) | (np.isnan(bounds) & np.isnan(old))
+                if same.all():
+                    bounds = old
+            self.__set_bounds(bounds)
+        return self.__bounds
+
+    @property
+    def tops(self):
+        """
+        Property. The 'z' of every interval's top.
+
+        Returns:
+            ndarray. A read-only array of floats.
+        """
+        return self._bounds[_TOP]
+
+    @property
+    def bases(self):
+        """
+        Property. The 'z' of every interval's base.
+
+        Returns:
+            ndarray. A read-only array of floats.
+        """
+        return self._bounds[_BASE]
+
+    @property
+    def thicknesses(self):
+        """
+        Property. The thickness of every interval.
+
+        Returns:
+            ndarray. An array of floats.
+        """
+        return np.abs(self.bases - self.tops)
+
     def __strict(self):
         """
         Private method. Checks if striplog is monotonically increasing in
@@ -253,13 +462,10 @@ class Striplog(object):
         Returns:
             Bool.
         """
-        def conc(a, b):
-            return a + b
-
-        # Check boundaries, b
-        b = np.array(reduce(conc, [[i.top.z, i.base.z] for i in self]))
+        # Interleave the boundaries, b
+        b = np.column_stack((self.tops, self.bases)).ravel()
 
-        return all(np.diff(b) >= 0)
+        return bool(np.all(np.diff(b) >= 0))
 
     @property
     def cum(self):
@@ -275,10 +481,7 @@ class Striplog(object):
         Returns:
             Float. The cumulative thickness.
         """
-        total = 0.0
-        for i in self:
-            total += i.thickness
-        return total
+        return float(np.sum(self.thicknesses))
 
     @property
     def mean(self):
@@ -308,10 +511,9 @@ class Striplog(object):
         Returns:
             List. A list of (Component, total thickness thickness) tuples.
         """
-        all_rx = set([iv.primary for iv in self])
-        table = {r: 0 for r in all_rx}
-        for iv in self:
-            table[iv.primary] += iv.thickness
+        table = {}
+        for iv, thick in zip(self.__list, self.thicknesses.tolist()):
+            table[iv.primary] = table.get(iv.primary, 0) + thick
 
         return sorted(table.items(), key=operator.itemgetter(1), reverse=True)
 
@@ -545,6 +747,59 @@ class Striplog(object):
 
         return list_of_Intervals
 
+    @classmethod
+    def _columns_from_csv(cls, f, dlm=',', fieldnames=None):
+        """
+        Private function. Reads delimited text, line by line, into a dict of
+        columns keyed on the lowercased field names. Values that can be
+        floats are converted, the rest are left as stripped strings.
+
+        Args:
+            f (file): An open file, or any iterable of lines.
+            dlm (str): The delimiter.
+            fieldnames (list): The field names, if the text has no header.
+
+        Returns:
+            dict.
+        """
+        # Deal with multiple spaces in space delimited file.
+        if dlm == ' ':
+            f = (re.sub(r'[ \t]+', ' ', line) for line in f)
+
+        reader = csv.reader(f, delimiter=dlm)
+        if fieldnames is None:
+            fieldnames = next(reader, [])
+        names = [k.strip().lower() for k in fieldnames]
+
+        # If a name is repeated, the last column wins, as in csv.DictReader.
+        positions = {k: i for i, k in enumerate(names)}
+        columns = {k: [] for k in positions}
+        pairs = [(i, columns[k]) for k, i in positions.items()]
+        n = len(names)
+
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < n:
+                row += [''] * (n - len(row))
+            for i, column in pairs:
+                column.append(row[i].strip())
+
+        def to_float(v):
+            try:
+                return float(v)
+            except ValueError:
+                return v
+
+        # Try each column as numbers in one go before trying cell by cell.
+        for k, column in columns.items():
+            try:
+                columns[k] = [float(v) for v in column]
+            except ValueError:
+                columns[k] = [to_float(v) for v in column]
+
+        return columns
+
     @classmethod
     def from_csv(cls, filename=None,
                  text=None,
@@ -562,46 +817,29 @@ class Striplog(object):
                  fieldnames=None):
         """
         Load from a CSV file or text.
+
+        The file is streamed, not read into memory all at once. You can also
+        pass an open file (or any iterable of lines) as ``filename``.
         """
         if (filename is None) and (text is None):
             raise StriplogError("You must provide a filename or CSV text.")
 
-        if (filename is not None):
+        if hasattr(filename, 'read'):
+            if source is None:
+                source = getattr(filename, 'name', None)
+            reorg = cls._columns_from_csv(filename, dlm=dlm, fieldnames=fieldnames)
+        elif (filename is not None):
             if source is None:
                 source = filename
             with open(filename, 'r') as f:
-                text = f.read()
+                reorg = cls._columns_from_csv(f, dlm=dlm, fieldnames=fieldnames)
+        else:
+            f = StringIO(text)
+            reorg = cls._columns_from_csv(f, dlm=dlm, fieldnames=fieldnames)
+            f.close()
 
         source = source or 'CSV'
 
-        # Deal with multiple spaces in space delimited file.
-        if dlm == ' ':
-            text = re.sub(r'[ \t]+', ' ', text)
-
-        if fieldnames is not None:
-            text = dlm.join(fieldnames) + '\n' + text
-
-        try:
-            f = StringIO(text)  # Python 3
-        except TypeError:
-            f = StringIO(unicode(text))  # Python 2
-
-        reader = csv.DictReader(f, delimiter=dlm)
-
-        # Reorganize the data to make fixing it easier.
-        reorg = {k.strip().lower(): [] for k in reader.fieldnames if k is not None}
-        t = f.tell()
-        for key in reorg:
-            f.seek(t)
-            for r in reader:
-                s = {k.strip().lower(): v.strip() for k, v in r.items()}
-                try:
-                    reorg[key].append(float(s[key]))
-                except ValueError:
-                    reorg[key].append(s[key])
-
-        f.close()
-
         remap = remap or {}
         for k, v in remap.items():
             reorg[v] = reorg.pop(k)
@@ -662,10 +900,7 @@ class Striplog(object):
         text = re.sub(r'(\n+|\r\n|\r)', '\n', text.strip())
 
         as_strings = []
-        try:
-            f = StringIO(text)  # Python 3
-        except TypeError:
-            f = StringIO(unicode(text))  # Python 2
+        f = StringIO(text)
         reader = csv.reader(f, delimiter=dlm, skipinitialspace=True)
         for row in reader:
             as_strings.append(row)
@@ -739,7 +974,10 @@ class Striplog(object):
                    source="Image",
                    col_offset=0.1,
                    row_offset=2,
-                   tolerance=0):
+                   tolerance=0,
+                   col_width=1,
+                   col_function='mode',
+                   row_step=1):
         """
         Read an image and generate Striplog.
 
@@ -756,15 +994,25 @@ class Striplog(object):
             tolerance (float): The Euclidean distance between hex colours,
                 which has a maximum (black to white) of 441.67 in base 10.
                 Default: 0.
+            col_width (Number): The width of the band of pixel columns to
+                use, centred on ``col_offset``. If < 1, the proportion of the
+                image width. Default: 1.
+            col_function (str): How to reduce the band to one colour per
+                row, 'mode' or 'median'. Default: 'mode'.
+            row_step (int): Only use every ``row_step``-th row of pixels.
+                Then ``row_offset`` counts these rows. Default: 1.
 
         Returns:
             Striplog: The ``striplog`` object.
         """
-        rgb = utils.loglike_from_image(filename, col_offset)
-        loglike = np.array([utils.rgb_to_hex(t) for t in rgb])
+        rgb = utils.loglike_from_image(filename, col_offset,
+                                       width=col_width,
+                                       function=col_function,
+                                       step=row_step)
+        loglike = utils.rgb_to_code(rgb)
 
-        # Get the pixels and colour values at 'tops' (i.e. changes).
-        tops, hexes = utils.tops_from_loglike(loglike, offset=row_offset)
+        # Get the pixels and colour codes at 'tops' (i.e. changes).
+        tops, codes = utils.tops_from_loglike(loglike, offset=row_offset)
 
         # If there are consecutive tops, we assume it's because there is a
         # single-pixel row that we don't want. So take the second one only.
@@ -772,17 +1020,15 @@ class Striplog(object):
         # it was prventing us from making intervals only one sample thick.
         nonconsecutive = np.append(np.diff(tops), 2)
         tops = tops[nonconsecutive > 1]
-        hexes = hexes[nonconsecutive > 1]
+        codes = codes[nonconsecutive > 1]
 
-        # Get the set of unique colours.
-        hexes_reduced = list(set(hexes))
+        # Get the set of unique colours, and turn the codes into integers.
+        codes_reduced, values = np.unique(codes, return_inverse=True)
+        hexes_reduced = utils.code_to_hex(codes_reduced)
 
         # Get the components corresponding to the colours.
-        components = [legend.get_component(h, tolerance=tolerance)
-                      for h in hexes_reduced]
-
-        # Turn them into integers.
-        values = [hexes_reduced.index(i) for i in hexes]
+        components, _ = legend.get_components(hexes_reduced,
+                                              tolerance=tolerance)
 
         basis = np.linspace(start, stop, loglike.size)
 
@@ -982,24 +1228,91 @@ class Striplog(object):
         """
         Eat a Canstrat DAT file and make a striplog.
         """
+        list_of_Intervals = []
         with open(filename) as f:
-            dat = f.read()
+            for card, d in iter_canstrat(f):
+                if card != 7:  # 7 is the 'card type' for lithology info.
+                    continue
+                if d.pop('skip'):
+                    continue
+                top = d.pop('top')
+                base = d.pop('base')
+                comps = [Component({'lithology': d['rtc'],
+                                    'colour': d['colour_name']
+                                    })]
+                iv = Interval(top=top, base=base, components=comps, data=d)
+                list_of_Intervals.append(iv)
+
+        return cls(list_of_Intervals, source=source)
 
-        data = parse_canstrat(dat)
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a striplog saved with ``Striplog.save()``. Nothing is parsed, so
+        this is much faster than reading a CSV or LAS file.
+
+        Args:
+            path (str): The file to read, or an open binary file.
+            mmap (bool): Whether to memory-map the arrays in the file instead
+                of reading them. The striplog then uses the file's boundary
+                array as its own. This saves little memory, since everything
+                else is turned into Python objects anyway. Default: True.
+
+        Returns:
+            Striplog.
+        """
+        arrays = utils.read_npz(path, mmap=mmap)
+        try:
+            meta = json.loads(str(arrays['meta']))
+        except (KeyError, ValueError):
+            meta = {}
+        if meta.get('format') != 'striplog':
+            raise StriplogError("This is not a file saved by Striplog.save().")
+
+        bounds = arrays['bounds']
+        tops, bases, tops_upper, tops_lower, bases_upper, bases_lower = \
+            bounds.tolist()
+        units = meta['units']
+
+        table = [Component(json.loads(c)) for c in arrays['component_table']]
+        codes = arrays['components'].tolist()
+        offsets = arrays['offsets'].tolist()
+        descriptions = arrays['description_table'].tolist()
+        desc_index = arrays['descriptions'].tolist()
+
+        columns = []
+        for j, (field, kind) in enumerate(meta['data']):
+            values = arrays['data_{}'.format(j)].tolist()
+            mask = arrays['mask_{}'.format(j)].tolist()
+            if kind == 'json':
+                values = [json.loads(v) if m else None
+                          for v, m in zip(values, mask)]
+            columns.append((field, values, mask))
+
+        # The file was checked when it was saved, so fill in the objects'
+        # attributes directly instead of setting them one by one.
+        def position(z, upper, lower):
+            p = Position.__new__(Position)
+            p.__dict__.update(middle=z, upper=upper, lower=lower, units=units)
+            return p
 
         list_of_Intervals = []
-        for d in data[7]:  # 7 is the 'card type' for lithology info.
-            if d.pop('skip'):
-                continue
-            top = d.pop('top')
-            base = d.pop('base')
-            comps = [Component({'lithology': d['rtc'],
-                                'colour': d['colour_name']
-                                })]
-            iv = Interval(top=top, base=base, components=comps, data=d)
+        for i in range(len(tops)):
+            iv = Interval.__new__(Interval)
+            iv.__dict__.update(
+                top=position(tops[i], tops_upper[i], tops_lower[i]),
+                base=position(bases[i], bases_upper[i], bases_lower[i]),
+                description=descriptions[desc_index[i]],
+                data={f: v[i] for f, v, m in columns if m[i]},
+                components=[copy(table[k])
+                            for k in codes[offsets[i]:offsets[i+1]]],
+            )
             list_of_Intervals.append(iv)
 
-        return cls(list_of_Intervals, source=source)
+        return cls.__from_sorted(list_of_Intervals,
+                                 bounds,
+                                 meta['order'],
+                                 meta['source'])
 
     def copy(self):
         """Returns a shallow copy."""
@@ -1102,6 +1415,137 @@ class Striplog(object):
                                         source=source,
                                         data=data)
 
+    @staticmethod
+    def __to_json(obj):
+        """
+        Private method. Encodes something as JSON for ``save()``, including
+        NumPy scalars.
+
+        Returns:
+            str.
+        """
+        def default(x):
+            if isinstance(x, np.generic):
+                return x.item()
+            m = "Cannot save {} in a striplog file.".format(type(x).__name__)
+            raise StriplogError(m)
+        return json.dumps(obj, sort_keys=True, default=default)
+
+    @staticmethod
+    def __data_kind(values):
+        """
+        Private method. Decides how ``save()`` stores a data field, from all
+        of its values: as a typed array ('bool', 'int', 'float' or 'str'), or
+        as JSON.
+
+        Returns:
+            str.
+        """
+        def every(test):
+            return all(test(v) for v in values)
+
+        if every(lambda v: isinstance(v, (bool, np.bool_))):
+            return 'bool'
+        if every(lambda v: isinstance(v, str)):
+            return 'str'
+        if every(lambda v: isinstance(v, numbers.Real)
+                 and not isinstance(v, (bool, np.bool_))):
+            if every(lambda v: isinstance(v, numbers.Integral)):
+                return 'int'
+            return 'float'
+        return 'json'
+
+    # Outputter
+    def save(self, path):
+        """
+        Save the striplog to a NumPy ``.npz`` file, for ``Striplog.load()``.
+        Unlike CSV and LAS files, this keeps every component, the
+        descriptions, the data, and the upper and lower bounds of the tops
+        and bases. Other attributes of the Positions, such as ``meta``, are
+        not saved.
+
+        The file holds the boundary array, a table of the distinct components
+        and descriptions, indices into them for each interval, and a column
+        for each data field.
+
+        Args:
+            path (str): The file to write to, or an open binary file. '.npz'
+                is added to file names that don't end in it.
+
+        Returns:
+            None.
+        """
+        # Dictionary-encode the components: a table of the distinct ones,
+        # and for each interval a run of indices into it.
+        # Components shared by several intervals are only encoded once.
+        table, seen, codes, offsets = {}, {}, [], [0]
+        descriptions, desc_index = {}, []
+        fields = {}
+        for iv in self.__list:
+            for c in iv.components:
+                code = seen.get(id(c))
+                if code is None:
+                    key = self.__to_json(c.__dict__)
+                    code = seen[id(c)] = table.setdefault(key, len(table))
+                codes.append(code)
+            offsets.append(len(codes))
+            d = descriptions.setdefault(iv.description, len(descriptions))
+            desc_index.append(d)
+            fields.update(dict.fromkeys(iv.data))
+
+        # Order the tables by code; dicts don't keep insertion order on
+        # every Python we support.
+        table = sorted(table, key=table.get)
+        descriptions = sorted(descriptions, key=descriptions.get)
+        arrays = {'bounds': self._bounds,
+                  'component_table': np.array(table, dtype=str),
+                  'components': np.array(codes, dtype=np.int64),
+                  'offsets': np.array(offsets, dtype=np.int64),
+                  'description_table': np.array(descriptions, dtype=str),
+                  'descriptions': np.array(desc_index, dtype=np.int64),
+                  }
+
+        # One typed column per data field, with a mask for the intervals
+        # that have it.
+        fill = {'bool': False, 'int': 0, 'float': np.nan, 'str': '', 'json': ''}
+        dtypes = {'bool': bool, 'int': np.int64, 'float': float,
+                  'str': str, 'json': str}
+        kinds = []
+        for j, field in enumerate(fields):
+            mask = [field in iv.data for iv in self.__list]
+            values = [iv.data[field] for iv in self.__list if field in iv.data]
+            kind = self.__data_kind(values)
+            if kind == 'json':
+                values = [self.__to_json(v) for v in values]
+            values = iter(values)
+            column = [next(values) if m else fill[kind] for m in mask]
+            arrays['data_{}'.format(j)] = np.array(column, dtype=dtypes[kind])
+            arrays['mask_{}'.format(j)] = np.array(mask, dtype=bool)
+            kinds.append([field, kind])
+
+        meta = {'format': 'striplog',
+                'version': 1,
+                'order': self.order,
+                'source': self.source,
+                'units': getattr(self.start, 'units', 'm'),
+                'data': kinds,
+                }
+        arrays['meta'] = np.array(self.__to_json(meta))
+
+        if not isinstance(path, str):
+            np.savez(path, **arrays)
+            return
+
+        # Write to a new file and move it into place, in case the old file
+        # is memory-mapped by a loaded striplog.
+        if not path.endswith('.npz'):
+            path += '.npz'
+        temp = path + '.tmp'
+        with open(temp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp, path)
+        return
+
     # Outputter
     def to_log(self,
                step=1.0,
@@ -1172,7 +1616,7 @@ class Striplog(object):
         if (field is not None) or (legend_field is not None):
             result = np.zeros_like(basis, dtype=dtype)
         else:
-            result = np.zeros_like(basis, dtype=np.int)
+            result = np.zeros_like(basis, dtype=int)
 
         if np.isnan(undefined):
             try:
@@ -1198,57 +1642,94 @@ class Striplog(object):
         if match_only is not None:
             if not isinstance(match_only, (list, tuple, set,)):
                 raise StriplogError("match_only should be a list, not a string")
-            table_new = []
+            table_new, seen = [], set()
             for c in table:
                 if c == '':
                     continue  # No idea why sometimes there's a ''
                 c_new = Component({k: v for k, v in c.__dict__.items()
                                    if k in match_only})
                 # Only add unique, and preserve order.
-                if c_new not in table_new:
+                if c_new._key() not in seen:
+                    seen.add(c_new._key())
                     table_new.append(c_new)
             table = table_new
-        else:
-            match_only = []
+
+        def key_for(c):
+            """Hashable key for a table entry or a primary component."""
+            if field:
+                return c
+            if match_only is not None:
+                c = c or Component()
+            if isinstance(c, Component):
+                return c._key(match_only)
+            return c
+
+        # Hash the table once; the first of any duplicates wins, as with
+        # ``list.index()``.
+        codes = {}
+        for code, c in enumerate(table):
+            try:
+                codes.setdefault(key_for(c), code)
+            except TypeError:
+                pass  # Unhashable; it can't be looked up anyway.
 
         start_ix = self.read_at(start, index=True)
         stop_ix = self.read_at(stop, index=True)
         if stop_ix is not None:
             stop_ix += 1
 
-        # Assign the values.
-        for i in self[start_ix:stop_ix]:
-            c = i.primary
-            if match_only:
-                c = Component({k: getattr(c, k, None)
-                               for k in match_only})
-
-            if legend and legend_field:  # Use the legend field.
-                try:
-                    key = legend.getattr(c, legend_field, undefined)
-                    key = key or undefined
-                except ValueError:
-                    key = undefined
-            elif field:  # Get data directly from that field in iv.data.
+        # Work out the value for each interval, remembering the answers
+        # for components we've already seen.
+        keys, seen = [], {}
+        for iv in self.__list[start_ix:stop_ix]:
+            if field and not (legend and legend_field):
                 f = field_function or utils.null
+                v = f(iv.data.get(field, undefined)) or undefined
                 try:
-                    v = f(i.data.get(field, undefined)) or undefined
-                    key = table.index(v)
-                except ValueError:
+                    key = codes.get(v, undefined)
+                except TypeError:
                     key = undefined
-            else:  # Use the lookup table.
-                try:
-                    key = table.index(c) or undefined
-                except ValueError:
-                    key = undefined
-
-            top_index = int(np.ceil((max(start, i.top.z)-start)/step))
-            base_index = int(np.ceil((min(stop, i.base.z)-start)/step))
-
-            try:
-                result[top_index:base_index+1] = key
-            except:  # Have a list or array or something.
-                result[top_index:base_index+1] = key[0]
+            else:
+                k = key_for(iv.primary)
+                if k in seen:
+                    key = seen[k]
+                elif legend and legend_field:  # Use the legend field.
+                    c = iv.primary
+                    if match_only is not None:
+                        c = Component({m: getattr(c, m, None)
+                                       for m in match_only})
+                    try:
+                        key = legend.getattr(c, legend_field, undefined)
+                        key = key or undefined
+                    except ValueError:
+                        key = undefined
+                    seen[k] = key
+                else:  # Use the look-up table.
+                    key = codes.get(k) or undefined
+                    seen[k] = key
+            if isinstance(key, (list, tuple, np.ndarray)):
+                key = key[0]  # Have a list or array or something.
+            keys.append(key)
+
+        # Find the samples at the top and base of every interval.
+        tops = self.tops[start_ix:stop_ix]
+        bases = self.bases[start_ix:stop_ix]
+        top_index = np.ceil((np.maximum(start, tops)-start)/step).astype(int)
+        base_index = np.ceil((np.minimum(stop, bases)-start)/step).astype(int)
+
+        # Assign the values. Where intervals share a sample, the later one
+        # wins. If the tops and bases both increase, which is the usual
+        # case, the last interval starting at or above each sample is the
+        # only one that can cover it, so we can fill in one pass.
+        if np.all(np.diff(top_index) >= 0) and np.all(np.diff(base_index) >= 0):
+            samples = np.arange(result.size)
+            ix = np.searchsorted(top_index, samples, side='right') - 1
+            covered = ix >= 0
+            covered[covered] = base_index[ix[covered]] >= samples[covered]
+            result[covered] = np.asarray(keys)[ix[covered]]
+        else:
+            for key, t, b in zip(keys, top_index, base_index):
+                result[t:b+1] = key
 
         if return_meta:
             return result, basis, table
@@ -1333,6 +1814,69 @@ class Striplog(object):
 
         return ax
 
+    def decimate(self, resolution):
+        """
+        Make a lower-resolution version of the striplog for display, in
+        which runs of intervals thinner than ``resolution`` (e.g. the
+        thickness of one pixel) are merged into blocks about that thick.
+        Each block gets the components and data of its thickest interval
+        having the dominant primary component (the one with the greatest
+        total thickness in the block). Thicker intervals are kept as they
+        are, not copied, so don't change the result.
+
+        Args:
+            resolution (float): The thickness below which to merge.
+
+        Returns:
+            Striplog: The decimated striplog, or this one if there is
+                nothing to merge.
+        """
+        bounds = self._bounds
+        tops, bases = bounds[_TOP], bounds[_BASE]
+        thick = np.abs(bases - tops)
+        upper = np.minimum(tops, bases)
+        pixel = np.floor((upper - upper.min()) / resolution)
+        small = thick < resolution
+
+        # A block starts at every interval, unless it and the one before it
+        # are both thin and start in the same pixel.
+        new = np.ones(len(self.__list), dtype=bool)
+        new[1:] = ~(small[1:] & small[:-1] & (pixel[1:] == pixel[:-1]))
+        if np.all(new):
+            return self
+
+        block = np.cumsum(new) - 1
+        starts = np.flatnonzero(new)
+        ends = np.append(starts[1:], len(self.__list)) - 1
+
+        # Total thickness of each primary component in each block.
+        codes = {}
+        comp = np.array([codes.setdefault(iv.primary, len(codes))
+                         for iv in self.__list])
+        pairs, inv = np.unique(block * len(codes) + comp,
+                               return_inverse=True)
+        total = np.bincount(inv, weights=thick)
+        order = np.lexsort((-total, pairs // len(codes)))
+        first = np.append(True, np.diff(pairs[order] // len(codes)) > 0)
+        dominant = pairs[order][first] % len(codes)
+
+        # The thickest interval with the dominant component in each block.
+        score = np.where(comp == dominant[block], thick, -1)
+        order = np.lexsort((-score, block))
+        rep = order[np.append(True, np.diff(block[order]) > 0)]
+
+        list_of_Intervals = []
+        for i, j, r in zip(starts, ends, rep):
+            if i == j:
+                list_of_Intervals.append(self.__list[i])
+                continue
+            iv = self.__list[r]
+            list_of_Intervals.append(Interval(self.__list[i].top.z,
+                                              self.__list[j].base.z,
+                                              components=iv.components,
+                                              data=iv.data))
+        return Striplog(list_of_Intervals, source=self.source)
+
     def max_field(self, field):
         return max(filter(None, [iv.data.get(field) for iv in self]))
 
@@ -1365,64 +1909,84 @@ class Striplog(object):
             cmap (cmap): Matplotlib colourmap. Default ``viridis``.
             default (float): The default (null) value.
             width_field (str): The field to use for the width of the patches.
-            **kwargs are passed through to matplotlib's ``patches.Rectangle``.
+            **kwargs are passed through to matplotlib's ``PolyCollection``.
 
         Returns:
             axis: The matplotlib.pyplot axis.
         """
+        # Matplotlib is only imported when it's needed, since it's slow.
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import PolyCollection
+        from . import hatches  # Registers the custom hatches.
+
         default_c = None
-        patches = []
-        for iv in self.__list:
-            origin = (0, iv.top.z)
-            d = legend.get_decor(iv.primary, match_only=match_only)
-            thick = iv.base.z - iv.top.z
-
-            if ladder:
-                if width_field is not None:
-                    w = iv.data.get(width_field, 1)
-                    w = default_width * w/self.max_field(width_field)
-                    default_c = 'gray'
-                elif legend is not None:
-                    w = d.width or default_width
-                    try:
-                        w = default_width * w/legend.max_width
-                    except:
-                        w = default_width
-            else:
-                w = default_width
-
-            # Allow override of lw
-            this_patch_kwargs = kwargs.copy()
-            lw = this_patch_kwargs.pop('lw', 0)
-            ec = this_patch_kwargs.pop('ec', 'k')
-            fc = this_patch_kwargs.pop('fc', None) or default_c or d.colour
-
-            if colour is None:
-                rect = mpl.patches.Rectangle(origin,
-                                             w,
-                                             thick,
-                                             fc=fc,
-                                             lw=lw,
-                                             hatch=d.hatch,
-                                             ec=ec,  # edgecolour for hatching
-                                             **this_patch_kwargs)
-                ax.add_patch(rect)
-            else:
-                rect = mpl.patches.Rectangle(origin,
-                                             w,
-                                             thick,
-                                             lw=lw,
-                                             ec=ec,  # edgecolour for hatching
-                                             **this_patch_kwargs)
-                patches.append(rect)
+        decors = [legend.get_decor(iv.primary, match_only=match_only)
+                  for iv in self.__list]
+
+        # Work out all the widths at once.
+        widths = np.full(len(self.__list), default_width, dtype=float)
+        if ladder:
+            if width_field is not None:
+                w = [iv.data.get(width_field, 1) for iv in self.__list]
+                widths *= np.array(w, dtype=float)
+                widths /= self.max_field(width_field)
+                default_c = 'gray'
+            elif legend is not None:
+                max_width = legend.max_width
+                if max_width:
+                    w = [d.width or default_width for d in decors]
+                    widths *= np.array(w, dtype=float) / max_width
+
+        # The corners of the rectangles, one (4 x 2) array per interval.
+        tops, bases = self.tops, self.bases
+        verts = np.zeros((len(self.__list), 4, 2))
+        verts[:, 1:3, 0] = widths[:, None]
+        verts[:, :2, 1] = tops[:, None]
+        verts[:, 2:, 1] = bases[:, None]
+
+        # Allow override of lw
+        this_patch_kwargs = kwargs.copy()
+        lw = this_patch_kwargs.pop('lw', 0)
+        ec = this_patch_kwargs.pop('ec', 'k')
+        fc = this_patch_kwargs.pop('fc', None) or default_c
 
         if colour is not None:
             cmap = cmap or 'viridis'
-            p = mpl.collections.PatchCollection(patches, cmap=cmap, lw=lw)
+            p = PolyCollection(verts, cmap=cmap, lw=lw)
             p.set_array(self.get_data(colour, colour_function, default=default))
             ax.add_collection(p)
             cb = plt.colorbar(p)  #  orientation='horizontal' only really works with ticks=[0, 0.1, 0.2] say
             cb.outline.set_linewidth(0)
+            return ax
+
+        # A collection can only have one hatch, so make one collection per
+        # hatch. If intervals overlap, keep the drawing order by only
+        # grouping runs of intervals with the same hatch.
+        patterns = [d.hatch for d in decors]
+        lo, hi = np.minimum(tops, bases), np.maximum(tops, bases)
+        order = np.argsort(lo, kind='stable')
+        overlaps = np.any(lo[order][1:] < np.maximum.accumulate(hi[order])[:-1])
+        groups = []
+        if overlaps:
+            for i, hatch in enumerate(patterns):
+                if groups and (groups[-1][0] == hatch):
+                    groups[-1][1].append(i)
+                else:
+                    groups.append((hatch, [i]))
+        else:
+            members = {}
+            for i, hatch in enumerate(patterns):
+                members.setdefault(hatch, []).append(i)
+            groups = list(members.items())
+
+        for hatch, ix in groups:
+            rects = PolyCollection(verts[ix],
+                                   facecolors=[fc or decors[i].colour for i in ix],
+                                   linewidths=lw,
+                                   hatch=hatch,
+                                   edgecolors=ec,  # edgecolour for hatching
+                                   **this_patch_kwargs)
+            ax.add_collection(rects)
 
         return ax
 
@@ -1458,6 +2022,7 @@ class Striplog(object):
              default=None,
              style='intervals',
              field=None,
+             lod=False,
              **kwargs):
         """
         Hands-free plotting.
@@ -1477,11 +2042,17 @@ class Striplog(object):
                 object. Default False.
             colour (str): Which data field to use for colours.
             cmap (cmap): Matplotlib colourmap. Default ``viridis``.
-            **kwargs are passed through to matplotlib's ``patches.Rectangle``.
+            lod (bool): Whether to merge intervals thinner than one pixel
+                before plotting, which is much faster for long striplogs.
+                See ``decimate()``. Default False.
+            **kwargs are passed through to matplotlib's ``PolyCollection``.
 
         Returns:
             None. Unless you specify ``return_fig=True`` or pass in an ``ax``.
         """
+        import matplotlib.pyplot as plt
+        from matplotlib import ticker
+
         if legend is None:
                 legend = Legend.random(self.components)
 
@@ -1507,17 +2078,23 @@ class Striplog(object):
             ax = self.plot_tops(ax=ax, legend=legend, field=field)
             ax.set_xticks([])
         else:
-            ax = self.plot_axis(ax=ax,
-                                legend=legend,
-                                ladder=ladder,
-                                default_width=width,
-                                match_only=kwargs.get('match_only', match_only),
-                                colour=colour,
-                                cmap=cmap,
-                                default=default,
-                                width_field=field,
-                                **kwargs
-                                )
+            strip = self
+            if lod:
+                # The thickness of one pixel at this figure's size and DPI.
+                span = abs(self[0].top.z - self[-1].base.z)
+                pixels = ax.get_window_extent().height
+                strip = self.decimate(span / max(pixels, 1))
+            ax = strip.plot_axis(ax=ax,
+                                 legend=legend,
+                                 ladder=ladder,
+                                 default_width=width,
+                                 match_only=kwargs.get('match_only', match_only),
+                                 colour=colour,
+                                 cmap=cmap,
+                                 default=default,
+                                 width_field=field,
+                                 **kwargs
+                                 )
 
             ax.set_xlim([0, width])
             ax.set_xticks([])
@@ -1542,11 +2119,11 @@ class Striplog(object):
             ticks = (mi, ma)
 
         # Carry on plotting...
-        minorLocator = mpl.ticker.MultipleLocator(ticks[0])
+        minorLocator = ticker.MultipleLocator(ticks[0])
         ax.yaxis.set_minor_locator(minorLocator)
 
-        majorLocator = mpl.ticker.MultipleLocator(ticks[1])
-        majorFormatter = mpl.ticker.FormatStrFormatter('%d')
+        majorLocator = ticker.MultipleLocator(ticks[1])
+        majorFormatter = ticker.FormatStrFormatter('%d')
         ax.yaxis.set_major_locator(majorLocator)
         ax.yaxis.set_major_formatter(majorFormatter)
 
@@ -1570,6 +2147,61 @@ class Striplog(object):
         else:
             return
 
+    def __lookup_arrays(self):
+        """
+        Private method. Gets the arrays that ``read_at()`` searches: the
+        tops, and the running maximum of the bases, both flipped if necessary
+        so that they increase with index. The first interval whose running
+        maximum base reaches a depth is the first that might span it.
+
+        Returns:
+            tuple. The sign, tops, running max of bases, and whether the tops
+                are sorted (if not, we have to fall back to a full scan).
+        """
+        bounds = self._bounds
+        cached = self.__lookup
+        if (cached is None) or (cached[0] is not bounds) \
+           or (cached[1] != self.order):
+            sign = -1.0 if self.order == 'elevation' else 1.0
+            tops = sign * bounds[_TOP]
+            bases = sign * bounds[_BASE]
+            reach = np.maximum.accumulate(bases)
+            is_sorted = bool(np.all(np.diff(tops) >= 0))
+            cached = (bounds, self.order, (sign, tops, bases, reach, is_sorted))
+            self.__lookup = cached
+        return cached[2]
+
+    def read_at_many(self, d):
+        """
+        Get the indices of the intervals at an array of 'depths' (though these
+        might be elevations or ages or anything), in one go.
+
+        Args:
+            d (array-like): The 'depths' to query.
+
+        Returns:
+            ndarray: The index of the first interval spanning each depth, or
+                -1 where the depth is outside all of the intervals.
+        """
+        sign, tops, bases, reach, is_sorted = self.__lookup_arrays()
+        d = sign * np.asarray(d, dtype=float)
+        shape, d = d.shape, d.ravel()
+
+        if is_sorted:
+            ix = np.searchsorted(reach, d, side='left')
+            hit = ix < tops.size
+            hit[hit] = tops[ix[hit]] <= d[hit]
+            result = np.where(hit, ix, -1)
+        else:
+            # Something has shuffled the intervals; scan for each depth.
+            result = np.full(d.shape, -1, dtype=int)
+            for i, z in enumerate(d):
+                hits = np.flatnonzero((tops <= z) & (bases >= z))
+                if hits.size:
+                    result[i] = hits[0]
+
+        return result.reshape(shape)
+
     def read_at(self, d, index=False):
         """
         Get the index of the interval at a particular 'depth' (though this
@@ -1584,10 +2216,10 @@ class Striplog(object):
                 interval, at the specified 'depth', or ``None`` if the depth is
                 outside the striplog's range.
         """
-        for i, iv in enumerate(self):
-            if iv.spans(d):
-                return i if index else iv
-        return None
+        i = int(self.read_at_many(d))
+        if i < 0:
+            return None
+        return i if index else self.__list[i]
 
     def depth(self, d):
         """
@@ -1599,38 +2231,72 @@ class Striplog(object):
             warnings.warn(w)
         return self.read_at(d)
 
-    def extract(self, log, basis, name, function=None):
+    def extract(self, log, basis, name=None, function=None):
         """
         'Extract' a log into the components of a striplog.
 
+        Each log sample is assigned to the interval spanning it, and the
+        samples in each interval are reduced with ``function``. Several logs
+        on the same basis can be extracted at once, so the basis is only
+        looked up once.
+
         Args:
-            log (array_like). A log or other 1D data.
+            log (array_like). A log or other 1D data. For several logs, pass a
+                2D array with one row per log, or a dict of {name: log}.
             basis (array_like). The depths or elevations of the log samples.
             name (str). The name of the attribute to store in the components.
-            function (function). A function that takes an array as the only
-                input, and returns whatever you want to store in the 'name'
-                attribute of the primary component.
+                If ``log`` is a 2D array, give a list of names, one per row.
+                Ignored if ``log`` is a dict.
+            function (function or str). A function that takes an array as the
+                only input, and returns whatever you want to store in the
+                'name' attribute of the primary component. Or, much faster,
+                the name of a built-in reduction: 'mean', 'median', 'min',
+                'max', 'sum', 'count', 'std', or a percentile such as 'p10',
+                'p50' or 'p90'. You can also pass a dict of these, keyed on
+                the log names.
         Returns:
             None. The function works on the striplog in place.
         """
-        # Build a dict of {index: [log values]} to keep track.
-        intervals = {}
-        previous_ix = -1
-        for i, z in enumerate(basis):
-            ix = self.read_at(z, index=True)
-            if ix is None:
-                continue
-            if ix == previous_ix:
-                intervals[ix].append(log[i])
+        if isinstance(log, dict):
+            names = list(log.keys())
+            logs = [np.asarray(l) for l in log.values()]
+        else:
+            log = np.asarray(log)
+            if log.ndim > 1:
+                if isinstance(name, str):
+                    name = [name]
+                names, logs = list(name or []), list(log)
             else:
-                intervals[ix] = [log[i]]
-            previous_ix = ix
+                names, logs = [name], [log]
+
+        if len(names) != len(logs):
+            m = "You must provide one name for each log."
+            raise StriplogError(m)
 
-        # Set the requested attribute in the primary comp of each interval.
-        for ix, data in intervals.items():
-            f = function or utils.null
-            d = f(np.array(data))
-            self[ix].data[name] = d
+        # Assign every sample to an interval, and gather each interval's
+        # samples together, keeping them in basis order.
+        ix = self.read_at_many(basis)
+        samples = np.flatnonzero(ix >= 0)
+        order = samples[np.argsort(ix[samples], kind='stable')]
+        ixs, starts = np.unique(ix[order], return_index=True)
+
+        if not ixs.size:
+            return None
+
+        # Set the requested attribute in the data of each interval.
+        for n, l in zip(names, logs):
+            if isinstance(function, dict):
+                f = function.get(n)
+            else:
+                f = function
+            values = l[order]
+            if isinstance(f, str):
+                results = utils.group_reduce(values, starts, f).tolist()
+            else:
+                f = f or utils.null
+                results = [f(v) for v in np.split(values, starts[1:])]
+            for i, d in zip(ixs.tolist(), results):
+                self.__list[i].data[n] = d
 
         return None
 
@@ -1685,27 +2351,25 @@ class Striplog(object):
         if len(self) == 1:
             return
 
-        hits = []
-        intervals = []
-
         if self.order == 'depth':
             one, two = 'base', 'top'
+            ones, twos = self.bases, self.tops
         else:
             one, two = 'top', 'base'
+            ones, twos = self.tops, self.bases
 
-        for i, iv in enumerate(self[:-1]):
-            next_iv = self[i+1]
-            if op(getattr(iv, one), getattr(next_iv, two)):
-                hits.append(i)
-
-                top = getattr(iv, one)
-                base = getattr(next_iv, two)
-                iv_gap = Interval(top, base)
-                intervals.append(iv_gap)
+        hits = np.where(op(ones[:-1], twos[1:]))[0].tolist()
 
         if index and hits:
             return hits
-        elif intervals:
+
+        intervals = []
+        for i in hits:
+            top = getattr(self.__list[i], one)
+            base = getattr(self.__list[i+1], two)
+            intervals.append(Interval(top, base))
+
+        if intervals:
             return Striplog(intervals)
         else:
             return
@@ -1748,59 +2412,71 @@ class Striplog(object):
             keep_ends (bool): Whether to keep the first and last, regardless
                 of whether they meet the pruning criteria.
         """
-        strip = self.copy()
-
         if not (limit or n or percentile):
             m = "You must provide a limit or n or percentile for pruning."
             raise StriplogError(m)
+
+        prune = np.zeros(len(self.__list), dtype=bool)
         if limit:
-            prune = [i for i, iv in enumerate(strip) if iv.thickness < limit]
+            prune = self.thicknesses < limit
         if n:
-            prune = strip.thinnest(n=n, index=True)
+            prune = np.zeros(len(self.__list), dtype=bool)
+            prune[self.thinnest(n=n, index=True)] = True
         if percentile:
-            n = np.floor(len(strip)*percentile/100)
-            prune = strip.thinnest(n=n, index=True)
+            n = np.floor(len(self.__list)*percentile/100)
+            prune = np.zeros(len(self.__list), dtype=bool)
+            prune[self.thinnest(n=n, index=True)] = True
 
         if keep_ends:
-            first, last = 0, len(strip) - 1
-            if first in prune:
-                prune.remove(first)
-            if last in prune:
-                prune.remove(last)
-
-        del strip[prune]
+            prune[[0, -1]] = False
 
-        return strip
+        keep = np.flatnonzero(~prune)
+        list_of_Intervals = [self.__list[i].copy() for i in keep.tolist()]
+        return self.__from_sorted(list_of_Intervals,
+                                  self._bounds[:, keep],
+                                  self.order,
+                                  self.source)
 
-    def anneal(self):
+    def __gaps(self):
         """
-        Fill in empty intervals by growing from top and base.
+        Private method. Finds the gaps between intervals, like
+        ``find_gaps(index=True)`` but as an array.
 
-        Note that this operation happens in-place and destroys any information
-        about the ``Position`` (e.g. metadata associated with the top or base).
-        See GitHub issue #54.
+        Returns:
+            ndarray. The indices of the intervals with gaps after them.
         """
-        strip = self.copy()
+        sign = -1.0 if self.order == 'elevation' else 1.0
+        tops = sign * self._bounds[_TOP]
+        bases = sign * self._bounds[_BASE]
+        return np.flatnonzero(bases[:-1] < tops[1:])
 
-        gaps = strip.find_gaps(index=True)
+    def anneal(self):
+        """
+        Fill in empty intervals by growing from top and base. Each gap is
+        closed at its midpoint.
 
-        if not gaps:
-            return
+        Note that this operation destroys any information about the
+        ``Position`` (e.g. metadata associated with the top or base) at the
+        gaps. See GitHub issue #54.
 
-        for gap in gaps:
-            before = strip[gap]
-            after = strip[gap + 1]
+        Returns:
+            Striplog. A new striplog.
+        """
+        gaps = self.__gaps()
+        bounds = self._bounds.copy()
+        list_of_Intervals = [self.__copy_interval(iv) for iv in self.__list]
 
-            if strip.order == 'depth':
-                t = (after.top.z-before.base.z)/2
-                before.base = before.base.z + t
-                after.top = after.top.z - t
-            else:
-                t = (after.base-before.top)/2
-                before.top = before.top.z + t
-                after.base = after.base.z - t
+        mids = (bounds[_BASE, gaps] + bounds[_TOP, gaps + 1]) / 2
+        for i, mid in zip(gaps.tolist(), mids.tolist()):
+            list_of_Intervals[i].base = mid
+            list_of_Intervals[i + 1].top = mid
+        bounds[np.ix_([_BASE, _BASE_UPPER, _BASE_LOWER], gaps)] = mids
+        bounds[np.ix_([_TOP, _TOP_UPPER, _TOP_LOWER], gaps + 1)] = mids
 
-        return strip
+        return self.__from_sorted(list_of_Intervals,
+                                  bounds,
+                                  self.order,
+                                  self.source)
 
     def fill(self, component=None):
         """
@@ -1812,17 +2488,66 @@ class Striplog(object):
         c = [component] if component is not None else []
 
         # Make the intervals to go in the gaps.
-        gaps = self.find_gaps()
-        if not gaps:
+        gaps = self.__gaps()
+        if not gaps.size:
             return self
-        for iv in gaps:
-            iv.components = c
 
-        return deepcopy(self) + gaps
+        list_of_Intervals = [self.__copy_interval(iv) for iv in self.__list]
+        for i in gaps[::-1].tolist():
+            top = copy(self.__list[i].base)
+            base = copy(self.__list[i + 1].top)
+            list_of_Intervals.insert(i + 1, Interval(top, base, components=c))
+
+        # Each gap's boundaries are the neighbouring base and top.
+        bounds = self._bounds
+        filler = np.empty((bounds.shape[0], gaps.size))
+        filler[[_TOP, _TOP_UPPER, _TOP_LOWER]] = \
+            bounds[[_BASE, _BASE_UPPER, _BASE_LOWER]][:, gaps]
+        filler[[_BASE, _BASE_UPPER, _BASE_LOWER]] = \
+            bounds[[_TOP, _TOP_UPPER, _TOP_LOWER]][:, gaps + 1]
+        bounds = np.insert(bounds, gaps + 1, filler, axis=1)
+
+        return self.__from_sorted(list_of_Intervals,
+                                  bounds,
+                                  self.order,
+                                  self.source)
+
+    def __sweep_arrays(self, other):
+        """
+        Private method. Gets the arrays for sweeping this striplog against
+        another: the tops and bases of both, flipped if necessary so that
+        they increase downwards, and, for each of this striplog's intervals,
+        the range of the other's intervals that might touch or overlap it.
+
+        Args:
+            other (Striplog): The other striplog.
+
+        Returns:
+            tuple. The sign, this striplog's tops and bases, the other's
+                tops and bases, and the start and end of each range; or None
+                if the striplogs can't be swept (e.g. if ``other`` is not
+                sorted).
+        """
+        if (self.order != other.order) or (self.order == 'none'):
+            return None
+        sign, tops, bases, reach, is_sorted = other.__lookup_arrays()
+        if not is_sorted:
+            return None
+        my_tops = sign * self._bounds[_TOP]
+        my_bases = sign * self._bounds[_BASE]
+
+        # The first of the other's intervals reaching this one's top, and the
+        # first starting below this one's base.
+        start = np.searchsorted(reach, my_tops, side='left')
+        end = np.searchsorted(tops, my_bases, side='right')
+        return sign, my_tops, my_bases, tops, bases, start, end
 
     def union(self, other):
         """
-        Makes a striplog of all unions.
+        Makes a striplog of all unions. Each interval is unioned with every
+        interval in the other striplog that it overlaps (including those it
+        only overlaps because of an earlier union). The result doesn't share
+        anything with either striplog.
 
         Args:
             Striplog. The striplog instance to union with.
@@ -1834,12 +2559,27 @@ class Striplog(object):
             m = "You can only union striplogs with each other."
             raise StriplogError(m)
 
+        sweep = self.__sweep_arrays(other)
         result = []
-        for iv in deepcopy(self):
-            for jv in other:
-                if iv.any_overlaps(jv):
-                    iv = iv.union(jv)
-            result.append(iv)
+        for i, iv in enumerate(self.__list):
+            if sweep is None:
+                for jv in other:
+                    if iv.any_overlaps(jv):
+                        iv = iv.union(jv)
+            else:
+                sign, _, my_bases, tops, _, start, _ = sweep
+                base = my_bases[i]
+                for j in range(start[i], len(other)):
+                    # Nothing further down can overlap.
+                    if tops[j] > base:
+                        break
+                    jv = other.__list[j]
+                    if iv.any_overlaps(jv):
+                        iv = iv.union(jv)
+                        base = sign * iv.base.z
+            # Interval.union() doesn't change its operands, so copy once at
+            # the end, taking in the other striplog's components too.
+            result.append(self.__copy_interval(iv))
         return Striplog(result)
 
     def intersect(self, other):
@@ -1856,14 +2596,27 @@ class Striplog(object):
             m = "You can only intersect striplogs with each other."
             raise StriplogError(m)
 
+        sweep = self.__sweep_arrays(other)
+        if sweep is None:
+            pairs = ((iv, jv) for iv in self for jv in other)
+        else:
+            # Pairs of intervals that might overlap, in order.
+            _, my_tops, _, _, bases, start, end = sweep
+            counts = np.clip(end - start, 0, None)
+            i = np.repeat(np.arange(len(self.__list)), counts)
+            first = np.repeat(np.cumsum(counts) - counts, counts)
+            j = np.repeat(start, counts) + np.arange(i.size) - first
+            keep = bases[j] >= my_tops[i]
+            pairs = ((self.__list[a], other.__list[b])
+                     for a, b in zip(i[keep].tolist(), j[keep].tolist()))
+
         result = []
-        for iv in self:
-            for jv in other:
-                try:
-                    result.append(iv.intersect(jv))
-                except IntervalError:
-                    # The intervals don't overlap
-                    pass
+        for iv, jv in pairs:
+            try:
+                result.append(iv.intersect(jv))
+            except IntervalError:
+                # The intervals don't overlap
+                pass
         return Striplog(result)
 
     def merge_overlaps(self):
@@ -1873,33 +2626,93 @@ class Striplog(object):
         The function takes no arguments and returns ``None``. It operates on
         the striplog 'in place'
 
-        TODO: This function will not work if any interval overlaps more than
-            one other intervals at either its base or top.
-        """
-        overlaps = np.array(self.find_overlaps(index=True))
-
-        if not overlaps.any():
+        Each group of overlapping intervals is split at all of their tops and
+        bases, and each piece gets the blended components, description and
+        data of all the intervals covering it, so intervals can overlap any
+        number of others.
+        """
+        bounds = self._bounds
+        sign = -1.0 if self.order == 'elevation' else 1.0
+        tops, bases = sign * bounds[_TOP], sign * bounds[_BASE]
+
+        # Sweep down the intervals; a new group starts at every interval
+        # whose top is at or below all the bases above it. Intervals with no
+        # thickness are left alone.
+        order = np.argsort(tops, kind='stable')
+        order = order[tops[order] < bases[order]]
+        reach = np.maximum.accumulate(bases[order])
+        new = np.append(True, tops[order][1:] >= reach[:-1])
+        if np.all(new):
             return
 
-        for overlap in overlaps:
-            before = self[overlap].copy()
-            after = self[overlap + 1].copy()
+        result = [iv for iv in self.__list if iv.top.z == iv.base.z]
+        for group in np.split(order, np.flatnonzero(new)[1:]):
+            intervals = [self.__list[i] for i in group]
+            if len(group) == 1:
+                result += intervals
+            else:
+                result += self.__merge_group(intervals,
+                                             tops[group],
+                                             bases[group],
+                                             sign)
+
+        # Rebuild the list in one go.
+        keys = np.array([sign * iv.top.z for iv in result])
+        self.__own()
+        self.__list[:] = [result[i] for i in np.argsort(keys, kind='stable')]
+        self.__bounds = None
+        return
 
-            # Get rid of the before and after pieces.
-            del self[overlap]
-            del self[overlap]
+    @staticmethod
+    def __merge_group(intervals, tops, bases, sign):
+        """
+        Private method. Splits a group of overlapping intervals into pieces
+        at all of their tops and bases, blending the intervals covering each
+        piece. Called by merge_overlaps().
 
-            # Make the new piece.
-            new_segment = before.merge(after)
+        Args:
+            intervals (list): The Intervals, sorted by top.
+            tops (ndarray): Their tops, increasing downwards.
+            bases (ndarray): Their bases, increasing downwards.
+            sign (float): -1 if in elevation order, otherwise 1.
 
-            # Insert it.
-            self.__insert(overlap, new_segment)
+        Returns:
+            list. The new Intervals, from the top down.
+        """
+        def piece(iv, upper, lower):
+            new = iv.copy()
+            if sign * upper != iv.top.z:
+                new.top = sign * upper
+            if sign * lower != iv.base.z:
+                new.base = sign * lower
+            return new
+
+        edges = np.unique(np.concatenate([tops, bases])).tolist()
+        by_base = np.argsort(bases, kind='stable').tolist()
+        tops, bases = tops.tolist(), bases.tolist()
+        active, a, b, result = set(), 0, 0, []
+        for upper, lower in zip(edges[:-1], edges[1:]):
+            while (a < len(tops)) and (tops[a] <= upper):
+                active.add(a)
+                a += 1
+            while (b < len(bases)) and (bases[by_base[b]] <= upper):
+                active.discard(by_base[b])
+                b += 1
+            if not active:
+                continue
 
-            overlaps += 1
+            # Blend the intervals in turn, in their original order.
+            members = sorted(active)
+            merged = intervals[members[0]]
+            new = piece(merged, upper, lower)
+            for m in members[1:]:
+                new = piece(intervals[m], upper, lower)._combine(merged, intervals[m])
+                merged = new
+            result.append(new)
 
-        return
+        return result
 
-    def merge_neighbours(self, strict=True):
+    def merge_neighbours(self, strict=True, match_only=None, key=None):
         """
         Makes a new striplog in which matching neighbours (for which the
         components are the same) are unioned. That is, they are replaced by
@@ -1909,6 +2722,11 @@ class Striplog(object):
         Args
             strict (bool): If True, then all of the components must match.
                 If False, then only the primary must match.
+            match_only (list of str): The component attributes to include in
+                the comparison. Default: All of them.
+            key (function): A function taking an Interval and returning
+                something hashable; neighbours match if their keys are equal.
+                Overrides ``strict`` and ``match_only``.
 
         Returns:
             Striplog. A new striplog.
@@ -1917,27 +2735,87 @@ class Striplog(object):
             Might need to be tweaked to deal with 'binary striplogs' if those
             aren't implemented with components.
         """
-        new_strip = [self[0].copy()]
-
-        for lower in self[1:]:
-
-            # Determine if touching.
-            touching = new_strip[-1].touches(lower)
-
-            # Decide if match.
+        if key is None:
             if strict:
-                similar = new_strip[-1].components == lower.components
+                def key(iv):
+                    return tuple(c._key(match_only) for c in iv.components)
             else:
-                similar = new_strip[-1].primary == lower.primary
-
-            # Union if both criteria met.
-            if touching and similar:
-                new_strip[-1] = new_strip[-1].union(lower)
+                def key(iv):
+                    p = iv.primary
+                    return None if p is None else p._key(match_only)
+
+        # Find runs of touching intervals with the same key.
+        keys = [key(iv) for iv in self.__list]
+        similar = np.array([a == b for a, b in zip(keys[:-1], keys[1:])],
+                           dtype=bool)
+        touching = self.bases[:-1] == self.tops[1:]
+        new = np.append(True, ~(similar & touching))
+
+        new_strip = []
+        for run in np.split(np.arange(len(self.__list)), np.flatnonzero(new)[1:]):
+            if run.size == 1:
+                iv = self.__list[run[0]].copy()
+                iv.top, iv.base = copy(iv.top), copy(iv.base)
+                new_strip.append(iv)
             else:
-                new_strip.append(lower.copy())
+                new_strip.append(self.__merge_run([self.__list[i] for i in run]))
 
         return Striplog(new_strip)
 
+    @staticmethod
+    def __merge_run(intervals):
+        """
+        Private method. Unions a run of touching intervals in one go,
+        collecting their components and data, and blending their
+        descriptions. Called by merge_neighbours().
+
+        Args:
+            intervals (list): The Intervals, in order.
+
+        Returns:
+            Interval. The union of the intervals.
+        """
+        first = intervals[0]
+        new = first.copy()
+        new.top, new.base = copy(first.top), copy(intervals[-1].base)
+
+        components = list(first.components)
+        seen = {c._key() for c in components}
+        for iv in intervals[1:]:
+            for c in iv.components:
+                if c._key() not in seen:
+                    seen.add(c._key())
+                    components.append(c)
+        new.components = components
+
+        data = {}
+        for iv in intervals:
+            for k, v in iv.data.items():
+                data[k] = utils.list_and_add(data[k], v) if k in data else v
+        new.data = data
+
+        if all(iv.components == first.components for iv in intervals):
+            new.description = first.description.strip(' .,')
+            return new
+
+        # Blend the descriptions by thickness, thickest first.
+        parts = {}
+        for i, iv in enumerate(intervals):
+            d = iv.description.strip(' .,') or iv.summary()
+            thick, _ = parts.get(d, (0, i))
+            parts[d] = (thick + iv.thickness, i)
+        total = sum(thick for thick, _ in parts.values()) or 1
+        parts = sorted(parts.items(), key=lambda p: p[1], reverse=True)
+        if len(parts) == 1:
+            new.description = parts[0][0]
+        elif parts[0][0]:
+            new.description = ' with '.join('{:.1f}% {}'.format(100*t/total, d)
+                                            for d, (t, _) in parts)
+        else:
+            new.description = ''
+
+        return new
+
     def thickest(self, n=1, index=False):
         """
         Returns the thickest interval(s) as a striplog.
@@ -1951,8 +2829,8 @@ class Striplog(object):
             Interval. The thickest interval. Or, if ``index`` was ``True``,
             the index of the thickest interval.
         """
-        s = sorted(range(len(self)), key=lambda k: self[k].thickness)
-        indices = s[-n:]
+        s = np.argsort(self.thicknesses, kind='stable')
+        indices = s[-int(n):].tolist()
         if index:
             return indices
         else:
@@ -1980,8 +2858,8 @@ class Striplog(object):
             If you ask for the thinnest bed and there's a tie, you will
             get the last in the ordered list.
         """
-        s = sorted(range(len(self)), key=lambda k: self[k].thickness)
-        indices = s[:n]
+        s = np.argsort(self.thicknesses, kind='stable')
+        indices = s[:int(n)].tolist()
         if index:
             return indices
         else:
@@ -2022,6 +2900,8 @@ class Striplog(object):
         TODO:
             Deal with numeric properties, so I can histogram 'Vp' values, say.
         """
+        import matplotlib.pyplot as plt
+
         # This seems like overkill, but collecting all this stuff gives
         # the user some choice about what they get back.
         comps = []
@@ -2090,6 +2970,8 @@ class Striplog(object):
         Returns:
             axis: If you sent an axis in, you get it back.
         """
+        import matplotlib.pyplot as plt
+
         if sort:
             if sort is True:
                 def func(x): return x.thickness
@@ -2180,6 +3062,8 @@ class Striplog(object):
             return Striplog(new_list)
         else:
             self.__list = new_list
+            self.__shared = False
+            self.__bounds = None
             return
 
     def quality(self, tests, alias=None):
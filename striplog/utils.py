@@ -5,26 +5,26 @@ Helper functions for the striplog package.
 """
 from string import Formatter
 from functools import partial
+from importlib.util import find_spec
 import re
 import shlex
+import struct
+import zipfile
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 from . import defaults
 
-try:
-    from IPython.display import HTML
-    ipy = True
-except:
-    ipy = False
-    pass
+# IPython is slow to import, so only look for it here; it's imported when
+# it's needed.
+ipy = find_spec('IPython') is not None
 
 
 def inspect_petrel(filename):
     data = read_petrel(filename)
     data = {k: ', '.join(list(map(str, set(v)))) for k, v in data.items()}
     if ipy:
+        from IPython.display import HTML
         return HTML(dict_repr_html(data))
     else:
         return data
@@ -231,6 +231,46 @@ def rgb_to_hex(rgb):
     return result.lower()
 
 
+def rgb_to_code(rgb):
+    """
+    Utility function to pack an array of (r,g,b) triples into integer
+    colour codes, 0xRRGGBB, converting them the same way as `rgb_to_hex()`.
+    Codes are much faster to compare and find runs in than hex strings.
+
+    Args:
+      rgb (ndarray): RGB triples along the last axis, in the range 0-255
+        or 0-1. Any alpha channel is ignored.
+
+    Returns:
+      ndarray: The uint32 codes, with one fewer dimension than `rgb`.
+    """
+    rgb = np.asarray(rgb)[..., :3]
+    if np.any(rgb < 0) or np.any(rgb > 255):
+        raise Exception("RGB values must all be 0-255 or 0-1")
+
+    # Like rgb_to_hex(), scale up triples that are all in 0-1.
+    unit = np.all(rgb <= 1, axis=-1)
+    scaled = np.where(unit[..., None], np.round(rgb * 255), rgb)
+    r, g, b = np.moveaxis(scaled.astype(np.uint32), -1, 0)
+    return (r << 16) | (g << 8) | b
+
+
+def code_to_hex(code):
+    """
+    Utility function to convert integer colour codes, as made by
+    `rgb_to_code()`, to hex.
+
+    Args:
+      code (int or array-like): The colour code(s).
+
+    Returns:
+      str or list: The hex code(s) for the colour(s).
+    """
+    if np.ndim(code) == 0:
+        return '#{:06x}'.format(int(code))
+    return ['#{:06x}'.format(c) for c in np.asarray(code).tolist()]
+
+
 def hex_to_rgb(hexx):
     """
     Utility function to convert hex to (r,g,b) triples.
@@ -248,6 +288,33 @@ def hex_to_rgb(hexx):
     return tuple(int(h[i:i+l//3], 16) for i in range(0, l, l//3))
 
 
+def rgb_to_lab(rgb):
+    """
+    Utility function to convert sRGB colours to CIELAB, in which the
+    distance between colours is closer to the perceived difference. Uses
+    the D65 white point.
+
+    Args:
+        rgb (ndarray): RGB triples in the range 0 to 255, along the last
+            axis.
+
+    Returns:
+        ndarray: The equivalent L*a*b* triples, with the same shape.
+    """
+    c = np.asarray(rgb, dtype=float) / 255
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    m = np.array([[0.4124564, 0.3575761, 0.1804375],
+                  [0.2126729, 0.7151522, 0.0721750],
+                  [0.0193339, 0.1191920, 0.9503041]])
+    xyz = np.dot(c, m.T) / np.array([0.95047, 1.0, 1.08883])
+    e = 6 / 29
+    f = np.where(xyz > e**3, np.cbrt(xyz), xyz / (3 * e**2) + 4 / 29)
+    L = 116 * f[..., 1] - 16
+    a = 500 * (f[..., 0] - f[..., 1])
+    b = 200 * (f[..., 1] - f[..., 2])
+    return np.stack([L, a, b], axis=-1)
+
+
 def hex_is_dark(hexx, percent=50):
     """
     Function to decide if a hex colour is dark.
@@ -277,30 +344,70 @@ def text_colour_for_hex(hexx, percent=50, dark='#000000', light='#ffffff'):
     return light if hex_is_dark(hexx, percent=percent) else dark
 
 
-def loglike_from_image(filename, offset):
+def loglike_from_image(filename, offset, width=1, function='mode', step=1):
     """
-    Get a log-like stream of RGB values from an image.
+    Get a log-like stream of RGB values from an image, either from a single
+    column of pixels or from a band of columns, reduced to one colour per
+    row. A band makes the log much less sensitive to noise in the image.
 
     Args:
-        filename (str): The filename of a PNG image.
+        filename (str or ndarray): The filename of a PNG image, or the image
+            itself as an array.
         offset (Number): If < 1, interpreted as proportion of way across
             the image. If > 1, interpreted as pixels from left.
+        width (Number): The width of the band of columns, centred on the
+            offset. If < 1, interpreted as proportion of the image width.
+            Default: 1, a single column.
+        function (str): How to reduce each row of the band to one colour:
+            'mode' (the commonest colour, the default) or 'median' (of each
+            channel).
+        step (int): Only use every step-th row, for a quicker log with lower
+            resolution. The log still spans the whole image. Default: 1.
 
     Returns:
         ndarray: A 2d array (a column of RGB triples) at the specified
         offset.
-
-    TODO:
-        Generalize this to extract 'logs' from images in other ways, such
-        as giving the mean of a range of pixel columns, or an array of
-        columns. See also a similar routine in pythonanywhere/freqbot.
     """
-    im = plt.imread(filename)
+    if function not in ('mode', 'median'):
+        raise ValueError("Unknown function: {}".format(function))
+
+    if isinstance(filename, np.ndarray):
+        im = filename
+    else:
+        from matplotlib.image import imread  # Slow, so only when needed.
+        im = imread(filename)
     if offset < 1:
         col = int(im.shape[1] * offset)
     else:
         col = offset
-    return im[:, col, :3]
+    if width < 1:
+        width = im.shape[1] * width
+    width = max(int(width), 1)
+
+    if width == 1:
+        return im[::step, col, :3]
+
+    lo = max(col - width // 2, 0)
+    band = im[::step, lo:lo + width, :3]
+
+    if function == 'median':
+        return np.median(band, axis=1)
+
+    # Sort the colours in each row, then find the longest run of equal
+    # colours in each row. Ties go to the lowest colour code.
+    codes = rgb_to_code(band)
+    rows, cols = codes.shape
+    order = np.argsort(codes, axis=1, kind='stable')
+    s = codes[np.arange(rows)[:, None], order]
+    new = np.ones(s.shape, dtype=bool)
+    new[:, 1:] = s[:, 1:] != s[:, :-1]
+    starts = np.flatnonzero(new)
+    lengths = np.diff(np.append(starts, s.size))
+    run_rows = starts // cols
+    longest = np.lexsort((-lengths, run_rows))
+    first = np.append(True, np.diff(run_rows[longest]) > 0)
+    modal = order.ravel()[starts[longest[first]]]
+    return band[np.arange(rows), modal]
 
 
 def tops_from_loglike(a, offset=0, null=None):
@@ -349,6 +456,154 @@ def tops_from_loglike(a, offset=0, null=None):
     return tops, values
 
 
+def group_reduce(a, starts, how):
+    """
+    Reduce contiguous groups of values to one value per group, in a few
+    vectorized passes instead of a Python loop over the groups.
+
+    Args:
+        a (ndarray): The values, ordered so that each group is contiguous.
+        starts (ndarray): The index in ``a`` of the first value of each group,
+            in increasing order.
+        how (str): The reduction: 'mean', 'median', 'min', 'max', 'sum',
+            'count', 'std', or a percentile like 'p10' or 'p90'. As with the
+            NumPy functions, a group containing NaN reduces to NaN.
+
+    Returns:
+        ndarray: One value per group.
+    """
+    a = np.asarray(a, dtype=float)
+    starts = np.asarray(starts, dtype=int)
+    if not starts.size:
+        return np.array([])
+    counts = np.diff(np.append(starts, a.size))
+
+    how = how.lower()
+    if how == 'count':
+        return counts
+    if how == 'sum':
+        return np.add.reduceat(a, starts)
+    if how == 'min':
+        return np.minimum.reduceat(a, starts)
+    if how == 'max':
+        return np.maximum.reduceat(a, starts)
+    if how == 'mean':
+        return np.add.reduceat(a, starts) / counts
+    if how == 'std':
+        means = np.add.reduceat(a, starts) / counts
+        sq = (a - np.repeat(means, counts))**2
+        return np.sqrt(np.add.reduceat(sq, starts) / counts)
+
+    if how == 'median':
+        q = 50
+    elif how[0] == 'p':
+        try:
+            q = float(how[1:])
+        except ValueError:
+            raise ValueError("Unknown reduction: {}".format(how))
+        if not 0 <= q <= 100:
+            m = "Percentiles must be between 0 and 100, not {}".format(how)
+            raise ValueError(m)
+    else:
+        raise ValueError("Unknown reduction: {}".format(how))
+
+    # Sort within each group, then interpolate linearly between the two
+    # closest ranks, like np.percentile().
+    groups = np.repeat(np.arange(starts.size), counts)
+    s = a[np.lexsort((a, groups))]
+    pos = starts + (q / 100) * (counts - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.ceil(pos).astype(int)
+    result = s[lo] + (s[hi] - s[lo]) * (pos - lo)
+
+    has_nan = np.add.reduceat(np.isnan(a), starts) > 0
+    result[has_nan] = np.nan
+
+    return result
+
+
+def read_npz(path, mmap=False):
+    """
+    Utility function to read all the arrays in a NumPy ``.npz`` file into a
+    dict. With ``mmap``, arrays stored uncompressed (as ``np.savez()`` does)
+    are memory-mapped from the file instead of being read. Any array that
+    isn't laid out that way (e.g. compressed members, or archives rewritten
+    by another zip tool) is read normally.
+
+    Args:
+      path (str): The file, or an open binary file (which is never
+        memory-mapped).
+      mmap (bool): Whether to memory-map the arrays.
+
+    Returns:
+      dict: The arrays, keyed by name.
+    """
+    with np.load(path, allow_pickle=False) as npz:
+        if not (mmap and isinstance(path, str)):
+            return {name: npz[name] for name in npz.files}
+        arrays = {}
+        with zipfile.ZipFile(path) as z, open(path, 'rb') as f:
+            for info in z.infolist():
+                name = info.filename[:-4]
+                array = _memmap_npz_member(f, info)
+                arrays[name] = npz[name] if array is None else array
+    return arrays
+
+
+def _memmap_npz_member(f, info):
+    """
+    Memory-maps one array in a ``.npz`` file, if it is stored plainly: not
+    compressed or encrypted, without a data descriptor or zip64 sizes, and
+    with a local header that agrees with the central directory.
+
+    Args:
+      f (file): The ``.npz`` file, open for reading in binary mode.
+      info (ZipInfo): The archive member holding the array.
+
+    Returns:
+      ndarray: A read-only ``np.memmap``, or None if the array can't be
+        memory-mapped.
+    """
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    if info.flag_bits & 0x09:  # Encrypted, or sizes in a data descriptor.
+        return None
+    if max(info.file_size, info.header_offset) >= 0xFFFFFFFF:  # Zip64.
+        return None
+
+    # The array data starts after the zip member's local header and the
+    # .npy header.
+    f.seek(info.header_offset)
+    local = f.read(30)
+    if len(local) < 30 or local[:4] != b'PK\x03\x04':
+        return None
+    name_len, extra_len = struct.unpack('<HH', local[26:])
+    if f.read(name_len) != info.filename.encode('utf-8'):
+        return None
+    f.seek(extra_len, 1)
+    start = f.tell()
+    try:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            header = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            header = np.lib.format.read_array_header_2_0(f)
+        else:
+            return None
+    except ValueError:
+        return None
+    shape, fortran, dtype = header
+    if (not shape) or (0 in shape) or dtype.hasobject:
+        return None
+
+    # The data must fill the rest of the member exactly.
+    offset = f.tell()
+    if offset - start + dtype.itemsize * np.prod(shape) != info.file_size:
+        return None
+    return np.memmap(f, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran else 'C')
+
+
 def list_and_add(a, b):
     """
     Coerce to lists and concatenate.
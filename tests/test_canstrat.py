@@ -2,9 +2,12 @@
 """
 Define a suite a tests for the canstrat reader.
 """
+import datetime
+
 import pytest
 
 from striplog import Striplog
+from striplog.canstrat import iter_canstrat, parse_canstrat
 
 
 def test_canstrat():
@@ -13,3 +16,54 @@ def test_canstrat():
     s = Striplog.from_canstrat('tests/data/test_canstrat.dat')
     assert len(s) == 28
     assert abs(s[3].data['grains_mm'] - 0.0012) < 0.0000001
+
+
+def test_iter_canstrat():
+    """Read the records one at a time.
+    """
+    with open('tests/data/test_canstrat.dat') as f:
+        records = list(iter_canstrat(f))
+    assert len(records) == 33
+    card, item = records[0]
+    assert card == 1
+    assert item['name'] == 'WELL NAME 101'
+    assert [c for c, _ in records].count(7) == 28
+
+    with open('tests/data/test_canstrat.dat') as f:
+        data = parse_canstrat(f.read())
+    assert data[1] == {'location': '01-99-111-11-1',
+                       'loctype': 'LSD',
+                       'units': 'I',
+                       'name': 'WELL NAME 101',
+                       'kb': 'KB',
+                       'elev': 11.0,
+                       'metric': 'M',
+                       'td': 1600.0,
+                       }
+    assert data[2]['spud'] == datetime.date(1955, 11, 11)
+    assert data[2]['uwi'] == '1000005520055150'
+    assert data[8][1] == {'formation': 'BB', 'top': 750.0}
+    assert data[7][0] == {'skip': False,
+                          'core': False,
+                          'top': 1221.0,
+                          'base': 1223.5,
+                          'lithology': 'J7609.S.',
+                          'rtc_id': 'J',
+                          'rtc': 'Sandstone',
+                          'rtc_idperc': 70,
+                          'grains_mm': 0.2185,
+                          'framew_per': 90,
+                          'colour': '.S.',
+                          'colour_name': 'Salt and Pepper',
+                          'accessories': 'PH1AR1SL1AG1',
+                          'porgrade': 0.09,
+                          'stain': 'None',
+                          'oil': 0,
+                          }
+    shale = data[7][3]
+    assert (shale['top'], shale['base']) == (1225.6, 1226.8)
+    assert shale['colour_name'] == 'Dark Green Gray'
+    assert 'porgrade' not in shale
+    chert = data[7][-3]
+    assert chert['framew_per'] == -1
+    assert chert['stain'] == 'None'
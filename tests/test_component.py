@@ -91,3 +91,23 @@ def test_from_text():
     assert rock3 == rock4
     rock5 = Component.from_text(s, lexicon, required='not there')
     assert not rock5  # Should be None
+
+
+def test_hash():
+    """
+    Test that equal components hash the same, and changes are seen.
+    """
+    rock, rock2, rock3 = Component(r), Component(r2), Component(r3)
+    assert hash(rock) == hash(rock2)
+    assert len({rock, rock2, rock3}) == 2
+    assert '_Component__key' not in rock.__dict__  # The key isn't a property.
+
+    rock2['lithology'] = 'Sandstone'
+    rock2.grainsize = 'coarse'
+    assert rock2 == rock3
+    assert hash(rock2) == hash(rock3)
+
+    # Numbers are ignored, but booleans are not.
+    r4 = {'lithology': 'sand'}
+    assert Component({'lithology': 'sand', 'porosity': 0.2}) == Component(r4)
+    assert Component({'lithology': 'sand', 'wet': True}) != Component(r4)
@@ -2,6 +2,9 @@
 """
 Define a suite a tests for the Interval module.
 """
+import gc
+import weakref
+
 import pytest
 
 from striplog import Lexicon
@@ -127,3 +130,28 @@ def test_interval_binary_errors():
         i1.merge(i4)
     with pytest.raises(IntervalError):
         i1.intersect(i4)
+
+
+def test_parse_cache():
+    """Test repeated descriptions are only parsed once.
+    """
+    lexicon = Lexicon.default()
+    Interval.clear_parse_cache()
+    iv1 = Interval(10, 20, "Red sandstone with grey shale", lexicon=lexicon, max_component=2)
+    iv2 = Interval(20, 30, "Red sandstone with grey shale", lexicon=lexicon, max_component=2)
+    info = Interval.parse_cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    assert iv1.components == iv2.components
+    assert iv1.primary is not iv2.primary
+
+    # Changing the lexicon means parsing again.
+    lexicon.colour = [r'red']
+    iv3 = Interval(30, 40, "Red sandstone with grey shale", lexicon=lexicon, max_component=2)
+    assert Interval.parse_cache_info().misses == 2
+    assert not getattr(iv3.components[1], 'colour', None)
+
+    # The cache doesn't keep lexicons alive.
+    ref = weakref.ref(lexicon)
+    del lexicon
+    gc.collect()
+    assert ref() is None
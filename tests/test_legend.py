@@ -95,6 +95,29 @@ def test_legend():
     assert not d == legend
 
 
+def test_get_decor():
+    """Test looking up decors, and seeing changes to the legend.
+    """
+    legend = Legend.from_csv(text=csv_text)
+
+    # First match wins; match_only filters the query.
+    rock = Component({'lithology': 'SANDSTONE', 'colour': 'red', 'grainsize': 'x'})
+    assert legend.get_decor(rock, match_only=['lithology']).colour == '#eeeeee'
+    assert legend.get_colour(rock) == '#eeeeee'
+    rock = Component({'lithology': 'Limestone', 'porosity': 0.1})
+    assert legend.get_colour(rock) == '#a6d1ff'
+    assert legend.get_colour(rock, match_only=['lithology']) == '#a6d1ff'
+
+    # Changing a component, or replacing a decor, is seen.
+    legend[6].component['lithology'] = 'chalk'
+    assert legend.get_colour(rock) == '#eeeeee'
+    assert legend.get_colour(Component({'lithology': 'chalk'})) == '#a6d1ff'
+    legend[6].component = Component({'lithology': 'limestone'})
+    assert legend.get_colour(rock) == '#a6d1ff'
+    legend[1] = Decor({'colour': 'red', 'component': Component({'lithology': 'limestone'})})
+    assert legend.get_colour(rock) == '#ff0000'
+
+
 def test_legend_builtins():
     """Test the builtins.
     """
@@ -104,6 +127,16 @@ def test_legend_builtins():
     # And builtin timescale.
     assert len(Legend.builtin_timescale('isc')) == 240
 
+    # They're parsed once, then copied, so changes don't leak.
+    legend = Legend.builtin('nsdoe')
+    legend[0].colour = '#000000'
+    legend[1].component.lithology = 'cheese'
+    fresh = Legend.builtin('NSDOE')
+    assert fresh[0].colour != '#000000'
+    assert fresh[1].component.lithology != 'cheese'
+    assert fresh[2] == legend[2] and fresh[2] is not legend[2]
+    assert fresh.get_colour(legend[2].component) == legend[2].colour
+
 
 def test_tolerance_warning(recwarn):
     """Test warning triggers if tolerance too low.
@@ -116,6 +149,25 @@ def test_tolerance_warning(recwarn):
     assert w.lineno
 
 
+def test_get_components():
+    """Test matching several colours at once.
+    """
+    legend = Legend.from_csv(text=csv_text)
+    colours = ['#F7E9A6', '#f7e9a8', '#000010', '#ffdbba']
+    comps, dists = legend.get_components(colours, tolerance=5)
+    assert [c.lithology for c in comps[:2]] == ['sandstone', 'sandstone']
+    assert comps[2] is None
+    assert comps[3] == legend[7].component
+    assert dists[0] == 0 and dists[1] == 2
+
+    comps, dists = legend.get_components(['#fe4d4a'], space='lab', tolerance=2)
+    assert comps[0].lithology == 'volcanic'
+    assert 0 < dists[0] < 2
+
+    with pytest.raises(LegendError):
+        legend.get_components(colours, space='hsv')
+
+
 def test_duplicate_warning(recwarn):
     """Test warning triggers if duplicate component in CSV.
     """
@@ -125,6 +177,11 @@ def test_duplicate_warning(recwarn):
     assert 'duplicate' in str(w.message)
     assert w.lineno
 
+    # All the duplicates are reported in one warning.
+    Legend.from_csv(text=csv_duplicate + '\n#FF99EE, 2, ANHYDRITE, ,')
+    assert len(recwarn) == 1
+    assert 'lines 4 (same as 3), 6 (same as 3)' in str(recwarn.pop().message)
+
 
 def test_error():
     """Test errors are raised.
@@ -19,6 +19,36 @@ def test_lexicon():
     answer = 'lighter green sandstone with spotty gray shale'
     assert lexicon.expand_abbreviations(s) == answer
 
+    # Longer abbreviations win over the shorter ones inside them.
+    s = "s&p ss w/ x-bd"
+    answer = 'salt & pepper sandstone with cross-bedded'
+    assert lexicon.expand_abbreviations(s) == answer
+
+    # Abbreviations ending in punctuation are expanded whole.
+    s = "S.W.C. med. ss fl/ a.a."
+    answer = 'sidewall core medium sandstone flowing same as above sample'
+    assert lexicon.expand_abbreviations(s) == answer
+
     fname = "tutorial/lexicon.json"
     l = Lexicon.from_json_file(fname)
     assert l.__repr__() is not ''
+
+
+def test_cache():
+    """Test the compiled patterns are reused, and refreshed on changes.
+    """
+    lexicon = Lexicon.default()
+    assert lexicon.find_word_groups('red sandstone', 'lithology') == ['sandstone']
+    pattern = lexicon._pattern('lithology')
+    assert lexicon._pattern('lithology') is pattern
+    assert '_cache' not in repr(lexicon)
+
+    version = lexicon._version
+    lexicon.lithology = [r'marl']
+    assert lexicon._version != version
+    assert lexicon.find_word_groups('red sandstone', 'lithology') == []
+    assert lexicon.find_word_groups('grey marl', 'lithology') == ['marl']
+
+    lexicon.synonyms['marl'] = ['marlstone']
+    lexicon.clear_cache()
+    assert lexicon.find_synonym('Marlstone') == 'marl'
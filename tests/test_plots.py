@@ -182,3 +182,17 @@ def test_bar():
     legend = Legend.builtin('nagmdm__6_2')
     ax = striplog.bar(sort=True, legend=legend, ax=ax)
     return fig
+
+
+def test_plot_axis_collections():
+    """Test intervals are drawn as one collection per hatch.
+    """
+    legend = Legend.builtin('canstrat')
+    imgfile = "tutorial/M-MG-70_14.3_135.9.png"
+    striplog = Striplog.from_image(imgfile, 14.3, 135.9, legend=legend)
+    fig, ax = plt.subplots()
+    ax = striplog.plot_axis(ax, legend=legend, ladder=True, default_width=2)
+    hatches = {legend.get_decor(iv.primary).hatch for iv in striplog}
+    assert len(ax.collections) == len(hatches)
+    assert sum(len(c.get_paths()) for c in ax.collections) == len(striplog)
+    plt.close(fig)
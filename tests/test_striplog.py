@@ -2,6 +2,9 @@
 """
 Define a suite a tests for the Striplog module.
 """
+import subprocess
+import sys
+
 import numpy as np
 import pytest
 
@@ -9,6 +12,7 @@ from striplog import Component
 from striplog import Interval
 from striplog import Legend
 from striplog import Lexicon
+from striplog import Position
 from striplog import Striplog
 from striplog.striplog import StriplogError
 
@@ -187,11 +191,160 @@ def test_from_image():
 
     striplog = striplog.merge_neighbours()
     assert len(striplog) == 11
+    assert len(striplog.merge_neighbours(strict=False)) == 11
+    assert len(striplog.merge_neighbours(key=lambda iv: 1)) == 1
 
     rock = striplog.find('sandstone')[1].components[0]
     assert rock in striplog
 
 
+def test_merge_neighbours():
+    """Test merging runs of matching neighbours.
+    """
+    sand = Component({'lithology': 'sand', 'colour': 'grey'})
+    red_sand = Component({'lithology': 'Sand', 'colour': 'red'})
+    clay = Component({'lithology': 'clay'})
+    ivs = [Interval(0, 1, components=[sand], data={'n': 1}, description='a'),
+           Interval(1, 2, components=[sand], data={'n': 2}, description='b'),
+           Interval(2, 4, components=[red_sand, clay], data={'n': 3}),
+           Interval(4, 5, components=[clay]),
+           Interval(6, 7, components=[clay]),  # Not touching.
+           ]
+    s = Striplog(ivs)
+
+    m = s.merge_neighbours()
+    assert len(m) == 4
+    assert m[0].base.z == 2
+    assert m[0].description == 'a'
+    assert m[0].data['n'] == [1, 2]
+
+    m = s.merge_neighbours(strict=False, match_only=['lithology'])
+    assert len(m) == 3
+    assert m[0].components == [sand, red_sand, clay]
+    assert m[0].data['n'] == [1, 2, 3]
+    assert m[0].description.startswith('50.0%')
+    assert s[0].base.z == 1  # The original is unchanged.
+
+    # The result doesn't share Positions with the original.
+    m[0].top.middle = -1
+    m[0].base.middle = 3
+    m[-1].top.middle = 5.5
+    assert s[0].top.z == 0
+    assert s[2].base.z == 4
+    assert s[-1].top.z == 6
+
+
+def test_prune_anneal_fill():
+    """Test pruning, annealing and filling.
+    """
+    thicknesses = [3, 0.5, 2, 0.25, 4, 1]
+    tops = [0, 4, 5, 7, 8, 12]
+    ivs = [Interval(t, t+h) for t, h in zip(tops, thicknesses)]
+    s = Striplog(ivs)
+
+    p = s.prune(n=2)
+    assert [iv.top.z for iv in p] == [0, 5, 8, 12]
+    p = s.prune(limit=1.1, keep_ends=True)
+    assert [iv.top.z for iv in p] == [0, 5, 8, 12]
+
+    a = p.anneal()
+    assert not a.find_gaps()
+    assert a[0].base.z == a[1].top.z == 4
+    assert s[0].base.z == 3  # The original is unchanged.
+    assert np.all(a.tops[1:] == a.bases[:-1])
+
+    e = Striplog([Interval(-t, -t-h) for t, h in zip(tops, thicknesses)])
+    a = e.anneal()
+    assert not a.find_gaps()
+    assert a[0].base.z == -3.5
+
+    f = s.fill(Component({'lithology': 'gap'}))
+    assert len(f) == 9
+    assert f[1].top.z == 3 and f[1].base.z == 4
+    assert f[1].primary.lithology == 'gap'
+    assert not f.find_gaps()
+    assert np.all(f.tops == [iv.top.z for iv in f])
+
+    # Changing the results leaves the original alone.
+    s = Striplog([Interval(t, t+h, components=[Component({'lithology': 'sand'})],
+                           data={'a': 1}) for t, h in zip(tops, thicknesses)])
+    for r in (s.fill(), s.anneal()):
+        r[0].top.middle = 55
+        r[0].data['a'] = 99
+        r[0].primary['lithology'] = 'x'
+        r[2].base.middle = 66
+        assert s[0].top.z == 0 and s[2].base.z == 7
+        assert s[0].data['a'] == 1
+        assert s[0].primary.lithology == 'sand'
+
+
+def test_slice_views():
+    """Test that slices share the list until one of them changes.
+    """
+    s = Striplog([Interval(t, t+1) for t in range(10)])
+    v = s[2:8]
+    assert len(v) == 6
+    assert v[0] is s[2]
+    assert np.all(v.tops == s.tops[2:8])
+    assert np.all(v[::-2].tops == [3, 5, 7])
+
+    w = v[1:-1]
+    del s[3]
+    assert len(s) == 9
+    assert len(w) == 4 and w[0].top.z == 3
+
+    del w[0]
+    assert w[0].top.z == 4
+    assert len(v) == 6 and v[1].top.z == 3
+
+    assert np.all(s[[0, 4]].tops == [0, 5])
+
+
+def test_save_load(tmp_path):
+    """Test saving and loading the binary format.
+    """
+    sand = Component({'lithology': 'sand', 'grainsize': 'vf'})
+    clay = Component({'lithology': 'clay'})
+    ivs = [Interval(Position(middle=120, upper=119, lower=121), 110,
+                    components=[sand, clay],
+                    description='Sand and clay',
+                    data={'gr': 45.5, 'code': 'A', 'ok': True}),
+           Interval(110, 105, components=[clay], data={'gr': 80, 'n': [1, 2]}),
+           Interval(105, 100, description='Gap'),
+           ]
+    s = Striplog(ivs, source='test')
+
+    path = str(tmp_path / 'striplog.npz')
+    s.save(path)
+    for mmap in (True, False):
+        t = Striplog.load(path, mmap=mmap)
+        assert t.order == 'elevation'
+        assert t.source == 'test'
+        assert np.all(t._bounds == s._bounds)
+        assert t[0].top.upper == 119
+        assert t[0].components == [sand, clay]
+        t[1].components[0]['lithology'] = 'silt'
+        assert t[0].components[1].lithology == 'clay'
+        assert t[2].components == []
+        assert t[2].description == 'Gap'
+        assert t[0].data == {'gr': 45.5, 'code': 'A', 'ok': True}
+        assert t[1].data == {'gr': 80, 'n': [1, 2]}
+        assert t[2].data == {}
+
+    # Compressed arrays can't be memory-mapped, so they are read instead.
+    arrays = dict(np.load(path))
+    zipped = str(tmp_path / 'compressed.npz')
+    np.savez_compressed(zipped, **arrays)
+    t = Striplog.load(zipped, mmap=True)
+    assert np.all(t._bounds == s._bounds)
+    assert t[1].data == {'gr': 80, 'n': [1, 2]}
+
+    # Overwriting a file that is in use.
+    t[1:].save(path)
+    assert len(Striplog.load(path)) == 2
+    assert t[0].top.z == 120
+
+
 def test_from_descriptions():
     """Test the CSV route.
     """
@@ -280,6 +433,21 @@ def test_striplog_merge():
     assert lappy.find_overlaps() is None
     assert lappy.merge_overlaps() is None
 
+    # An interval overlapping several others.
+    comps = [Component({'lithology': l}) for l in ['sand', 'silt', 'clay']]
+    ivs = [Interval(0, 10, components=[comps[0]], data={'n': 1}),
+           Interval(2, 4, components=[comps[1]], data={'n': 2}),
+           Interval(3, 6, components=[comps[2]], data={'n': 3})]
+    many = Striplog(ivs)
+    many.merge_overlaps()
+    assert many.find_overlaps() is None
+    assert [iv.top.z for iv in many] == [0, 2, 3, 4, 6]
+    assert many.stop.z == 10
+    assert many[2].components == comps
+    assert many[2].data['n'] == [1, 2, 3]
+    assert many[3].components == [comps[0], comps[2]]
+    assert many[4].components == [comps[0]]
+
 
 def test_striplog_union():
     """Test union.
@@ -299,6 +467,24 @@ def test_striplog_union():
     assert len(u) == 2
     assert len(u[0].components) == 2
 
+    # The originals are left alone.
+    u[1].top.middle = 50
+    u[1].data['foo'] = 1
+    u[0].components[0]['lithology'] = 'chalk'
+    u[0].components[1]['lithology'] = 'chalk'
+    assert lappy[1].top.z == 55
+    assert lappy[1].data == {}
+    assert lappy[0].primary.lithology == 'dolomite'
+    assert lippy[0].primary.lithology == 'marl'
+
+    # Unions can grow to reach further intervals.
+    loppy = Striplog([Interval(10, 58, components=[Component({'lithology': 'marl'})])])
+    u = loppy.union(lappy)
+    assert len(u) == 1
+    assert u[0].top.z == 0
+    assert u[0].base.z == 75
+    assert len(lappy.intersect(loppy)) == 2
+
 
 def test_fill():
     gappy = Striplog([Interval(**{'top': 0, 
@@ -365,3 +551,180 @@ def test_petrel():
     assert len(s) == 4
     assert s[3].base.z == 1056
     assert s[3].data['Name'] == 'Meguma'
+
+
+def test_bounds():
+    """Test the boundary arrays are kept in step with the intervals.
+    """
+    r1 = Component({'lithology': 'sand'})
+    r2 = Component({'lithology': 'shale'})
+    iv1 = Interval(80, 120, components=[r1])
+    iv2 = Interval(120, 150, components=[r2])
+    iv3 = Interval(180, 200, components=[r1])
+
+    s = Striplog([iv3, iv1, iv2])
+    assert np.allclose(s.tops, [80, 120, 180])
+    assert np.allclose(s.bases, [120, 150, 200])
+    assert np.allclose(s.thicknesses, [40, 30, 20])
+    assert s.cum == 90
+    assert s.thickest(index=True) == [0]
+    assert s.thinnest(n=2, index=True) == [2, 1]
+    assert s.find_gaps(index=True) == [1]
+
+    # Changing an interval in place refreshes the arrays.
+    s[1].base = 180
+    assert s.bases[1] == 180
+    assert s.find_gaps() is None
+
+    del s[0]
+    assert np.allclose(s.tops, [120, 180])
+
+    with pytest.raises(ValueError):
+        s.tops[0] = 0
+
+    # Making new Positions and Intervals elsewhere keeps the cache.
+    generation = Position._generation
+    Position(middle=10)
+    Interval(0, 1)
+    assert Position._generation == generation
+    assert s._Striplog__generation == generation
+
+    # But changing a Position in place doesn't.
+    s[0].top.middle = 100
+    assert s.tops[0] == 100
+    p = Position(upper=1, lower=3)
+    p.middle = 2.5
+    assert Position._generation > generation
+
+
+def test_read_at():
+    """Test the binary search agrees with a scan of the intervals.
+    """
+    r1 = Component({'lithology': 'sand'})
+    depth = Striplog([Interval(10, 20, components=[r1]),
+                      Interval(15, 40, components=[r1]),
+                      Interval(20, 25, components=[r1]),
+                      Interval(50, 60, components=[r1]),
+                      ])
+    elev = depth.invert(copy=True)
+
+    for s in (depth, elev):
+        zs = np.linspace(0, 70, 141)
+        expected = []
+        for z in zs:
+            hits = [i for i, iv in enumerate(s) if iv.spans(z)]
+            expected.append(hits[0] if hits else -1)
+        assert s.read_at_many(zs).tolist() == expected
+
+    assert depth.read_at(20, index=True) == 0
+    assert depth.read_at(30).top.z == 15
+    assert depth.read_at(45) is None
+    assert elev.read_at(55, index=True) == 0
+
+
+def test_extract():
+    """Test extracting several logs at once.
+    """
+    s = Striplog([Interval(10, 20, components=[Component({'lithology': 'sand'})]),
+                  Interval(20, 30, components=[Component({'lithology': 'shale'})]),
+                  ])
+    basis = np.arange(5, 35, 0.5)
+    gr = basis * 2
+    dt = basis * 10
+    s.extract({'GR': gr, 'DT': dt}, basis=basis, function='mean')
+    assert s[0].data['GR'] == np.mean(gr[(basis >= 10) & (basis <= 20)])
+    assert s[1].data['DT'] == np.mean(dt[(basis > 20) & (basis <= 30)])
+
+    s.extract(np.vstack([gr, dt]), basis=basis, name=['GR', 'DT'],
+              function={'GR': 'p90', 'DT': np.max})
+    assert s[1].data['GR'] == np.percentile(gr[(basis > 20) & (basis <= 30)], 90)
+    assert s[1].data['DT'] == 300
+
+    with pytest.raises(StriplogError):
+        s.extract(np.vstack([gr, dt]), basis=basis, name=['GR'])
+
+    # A single name isn't split into letters.
+    with pytest.raises(StriplogError):
+        s.extract(np.vstack([gr, dt]), basis=basis, name='GR')
+    s.extract(np.vstack([dt]), basis=basis, name='GR', function='max')
+    assert s[1].data['GR'] == 300
+
+
+def test_to_log():
+    """Test rasterizing, including overlaps and matching on some attributes.
+    """
+    s = Striplog([Interval(0, 2, components=[Component({'lithology': 'sand', 'colour': 'grey'})]),
+                  Interval(2, 4, components=[Component({'lithology': 'Shale'})]),
+                  Interval(3, 5, components=[Component({'lithology': 'sand', 'colour': 'red'})]),
+                  ])
+    log, basis, table = s.to_log(step=1, return_meta=True)
+    assert log.tolist() == [1, 1, 2, 3, 3, 3]
+    assert len(table) == 4
+
+    log, basis, table = s.to_log(step=1, match_only=['lithology'], return_meta=True)
+    assert log.tolist() == [1, 1, 2, 1, 1, 1]
+    assert len(table) == 3
+
+
+def test_from_csv():
+    """Test the CSV reader, from text and from an open file.
+    """
+    from io import StringIO
+
+    text = """Top,Base,Comp Lithology,Porosity
+              100,110,Sandstone,0.21
+              110,120,Shale,n/a
+              120,130,Sandstone,0.18"""
+    s = Striplog.from_csv(text=text)
+    assert len(s) == 3
+    assert s[0].primary.lithology == 'Sandstone'
+    assert s[0].data['porosity'] == 0.21
+    assert s[1].data['porosity'] == 'n/a'
+
+    lines = [l.strip().replace(',', '  ') for l in text.split('\n')]
+    s = Striplog.from_csv(StringIO('\n'.join(lines)), dlm=' ')
+    assert len(s) == 3
+    assert s.stop.z == 130
+
+    body = text.split('\n', 1)[1]
+    s = Striplog.from_csv(text=body, fieldnames=['top', 'base', 'comp lithology', 'phi'])
+    assert s[2].data['phi'] == 0.18
+
+
+def test_decimate():
+    """Test merging thin intervals for display.
+    """
+    sand = Component({'lithology': 'sandstone'})
+    shale = Component({'lithology': 'shale'})
+    tops = [0, 0.2, 0.3, 0.6, 1.2, 1.4, 5]
+    comps = [sand, shale, sand, shale, shale, sand]
+    ivs = [Interval(t, b, components=[c], data={'i': i})
+           for i, (t, b, c) in enumerate(zip(tops[:-1], tops[1:], comps))]
+    s = Striplog(ivs)
+
+    d = s.decimate(1)
+    assert len(d) == 3
+    assert d[0].top.z == 0 and d[0].base.z == 1.2
+    assert d[0].primary == shale  # 0.4 of shale vs 0.3 of sandstone.
+    assert d[0].data['i'] == 3  # The thickest shale.
+    assert d[2] is s[-1]
+    assert d.cum == s.cum
+
+    # Changes to the striplog show up in the next result.
+    s[1].primary['lithology'] = 'sandstone'
+    assert s.decimate(1)[0].primary == sand
+    s[3].components = [sand]
+    s[3].data = {'i': 9}
+    assert s.decimate(1)[0].data['i'] == 9
+    assert s.decimate(0.1) is s
+
+
+def test_lazy_imports():
+    """Test that importing striplog doesn't import matplotlib or IPython.
+    """
+    code = ("import sys, striplog; "
+            "print(any(m.split('.')[0] in ('matplotlib', 'IPython') "
+            "for m in sys.modules))")
+    out = subprocess.check_output([sys.executable, '-W', 'ignore', '-c', code],
+                                  universal_newlines=True)
+    assert out.strip() == 'False'
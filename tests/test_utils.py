@@ -8,10 +8,13 @@ import numpy as np
 from striplog.utils import null
 from striplog.utils import partialmethod
 from striplog.utils import rgb_to_hex, hex_to_rgb
+from striplog.utils import rgb_to_code, code_to_hex
 from striplog.utils import hex_to_name, name_to_hex
 from striplog.utils import hex_is_dark, text_colour_for_hex
 from striplog.utils import list_and_add
 from striplog.utils import tops_from_loglike
+from striplog.utils import loglike_from_image
+from striplog.utils import group_reduce
 
 
 def test_null():
@@ -88,6 +91,38 @@ def test_list_and_add():
     assert len(list_and_add(b, a)) == 4
 
 
+def test_rgb_to_code():
+    """Test packing colours into integers agrees with hex conversion.
+    """
+    rgb = np.array([[0, 0, 0], [1, 1, 1], [0.5, 0.2, 0.1], [255, 128, 1]])
+    codes = rgb_to_code(rgb)
+    assert codes.dtype == np.uint32
+    assert code_to_hex(codes) == [rgb_to_hex(t) for t in rgb]
+    assert code_to_hex(codes[-1]) == '#ff8001'
+
+    image = np.ones((4, 2, 4), dtype=np.float32)  # With alpha.
+    assert rgb_to_code(image).shape == (4, 2)
+
+
+def test_loglike_from_image():
+    """Test sampling a band of pixel columns.
+    """
+    im = np.zeros((6, 10, 3), dtype=np.uint8)
+    im[3:] = 200
+    im[1, 4:6] = 255  # Noise.
+    im[4, 5] = 10
+
+    assert np.all(loglike_from_image(im, 5)[:, 0] == [0, 255, 0, 200, 10, 200])
+    mode = loglike_from_image(im, 5, width=5)
+    assert np.all(mode[:, 0] == [0, 0, 0, 200, 200, 200])
+    median = loglike_from_image(im, 0.5, width=0.5, function='median')
+    assert np.all(median[:, 0] == [0, 0, 0, 200, 200, 200])
+    assert loglike_from_image(im, 5, width=5, step=2).shape == (3, 3)
+    for width in (1, 5):
+        with pytest.raises(ValueError):
+            loglike_from_image(im, 5, width=width, function='bogus')
+
+
 def test_tops_from_loglike():
     a = [1,1,1,2,2,2,-1,-1,-1,np.nan,np.nan,-2,-2,-2]
     tops, values = tops_from_loglike(a)
@@ -96,3 +131,23 @@ def test_tops_from_loglike():
     a = [1,1,1,2,2,2,-1,-1,-1,-2,-2,-2,-2,-2]
     tops, values = tops_from_loglike(a)
     assert len(values) == 4
+
+
+def test_group_reduce():
+    a = np.array([3, 1, 2, 10, 30, 20, 40, 5])
+    starts = [0, 3, 7]
+    groups = np.split(a, starts[1:])
+    for how, func in [('mean', np.mean), ('median', np.median),
+                      ('min', np.min), ('max', np.max), ('sum', np.sum),
+                      ('std', np.std)]:
+        assert np.allclose(group_reduce(a, starts, how),
+                           [func(g) for g in groups])
+    assert np.allclose(group_reduce(a, starts, 'p10'),
+                       [np.percentile(g, 10) for g in groups])
+    assert group_reduce(a, starts, 'count').tolist() == [3, 4, 1]
+    assert np.isnan(group_reduce([1, np.nan, 2], [0, 2], 'p90')[0])
+
+    with pytest.raises(ValueError):
+        group_reduce(a, starts, 'mode')
+    with pytest.raises(ValueError):
+        group_reduce(a, starts, 'p110')